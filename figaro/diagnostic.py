@@ -3,26 +3,23 @@ import numpy as np
 from numba import jit, prange
 from pathlib import Path
 
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-from distutils.spawn import find_executable
-
 from figaro.cumulative import fast_cumulative
 from figaro.exceptions import FIGAROException
 
-if find_executable('latex'):
-    rcParams["text.usetex"] = True
-rcParams["xtick.labelsize"]=14
-rcParams["ytick.labelsize"]=14
-rcParams["xtick.direction"]="in"
-rcParams["ytick.direction"]="in"
-rcParams["legend.fontsize"]=12
-rcParams["axes.labelsize"]=16
-rcParams["axes.grid"] = True
-rcParams["grid.alpha"] = 0.6
-
 log2e = np.log2(np.e)
 
+def _import_pyplot():
+    """
+    Imports matplotlib.pyplot and sets the FIGARO plot style (figaro.utils._configure_mpl) on first use. The entropy and autocorrelation estimators are used during the inference (e.g. by threeDvolume, possibly in worker processes), which do not need matplotlib.
+    
+    Returns:
+        :module: matplotlib.pyplot
+    """
+    import matplotlib.pyplot as plt
+    from figaro.utils import _configure_mpl
+    _configure_mpl()
+    return plt
+
 @jit
 def angular_coefficient(x, y):
     """
@@ -79,6 +76,7 @@ def plot_angular_coefficient(entropy, L = 500, ac_expected = None, out_folder =
         :np.ndarray: angular coefficients
     """
     S = compute_angular_coefficients(entropy, L = L)
+    plt     = _import_pyplot()
     fig, ax = plt.subplots()
     if ac_expected is not None:
         ax.axhline(ac_expected, lw = 0.5, ls = '--', c = 'r')
@@ -158,6 +156,7 @@ def autocorrelation(draws, bounds = None, out_folder = '.', name = 'event', n_po
     
     taumax, ac = compute_autocorrelation(functions, mean, dx)
     
+    plt     = _import_pyplot()
     fig, ax = plt.subplots()
     ax.axhline(0, lw = 0.5, ls = '--', c = 'r')
     ax.plot(np.arange(taumax), ac, ls = '--', marker = '', lw = 0.7)
@@ -231,6 +230,7 @@ def entropy(draws, out_folder = '.', exp_entropy = None, name = 'event', n_draws
         :np.ndarray: entropy
     """
     S = compute_entropy(draws, int(n_draws))
+    plt     = _import_pyplot()
     fig, ax = plt.subplots()
     ax.plot(np.arange(1, len(draws)+1)*step, S, ls = '--', marker = '', lw = 0.7)
     if exp_entropy is not None:
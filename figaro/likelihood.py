@@ -1,46 +1,227 @@
 import numpy as np
-from numba import jit, njit, prange
+from numba import njit, prange
+from functools import lru_cache
 
 LOG2PI = np.log(2*np.pi)
+# fastmath flags without the no-inf/no-nan assumptions (logsumexp must handle -inf terms, predictive likelihoods can be inf/NaN for samples outside the bounds)
+FASTMATH_INF = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
 
 #-----------#
 # Functions #
 #-----------#
 
-@njit
-def inv_jit(M):
-  return np.linalg.inv(M)
-
-@njit
+@njit(cache = True, fastmath = True)
 def logdet_jit(M):
-    return np.log(np.linalg.det(M))
+    """
+    Log-determinant of a matrix, from a single LU decomposition (no overflow/underflow of det(M))
+    
+    Arguments:
+        :np.ndarray M: matrix
+    
+    Returns:
+        :double: log(|det(M)|)
+    """
+    sign, logdet = np.linalg.slogdet(M)
+    return logdet
 
-@jit
+@njit(cache = True, fastmath = FASTMATH_INF)
+def logsumexp_update(a_max, s, a, b):
+    """
+    Single step of the streaming logsumexp: given the running maximum a_max and the running sum s = sum(b_i*exp(a_i-a_max)), includes the new term b*exp(a).
+    
+    Arguments:
+        :double a_max: running maximum
+        :double s:     running rescaled sum
+        :double a:     new exponent
+        :double b:     new weight
+    
+    Returns:
+        :double: updated running maximum
+        :double: updated running rescaled sum
+    """
+    if a > a_max:
+        return a, s*np.exp(a_max - a) + b
+    if a == a_max:
+        # Also covers a = a_max = -inf, where exp(a - a_max) would be NaN
+        return a_max, s + b
+    return a_max, s + b*np.exp(a - a_max)
+
+@njit(cache = True, fastmath = FASTMATH_INF)
 def logsumexp_jit(a, b):
-    a_max = np.max(a)
-    tmp = b * np.exp(a - a_max)
-    return np.log(np.sum(tmp)) + a_max
+    """
+    log(sum(b*exp(a))), evaluated in a single pass without temporary arrays.
+    The running maximum is updated term by term, so no term is rescaled by more than the current spread and -inf terms are handled as in scipy.
+    
+    Arguments:
+        :np.ndarray a: exponents
+        :np.ndarray b: weights
+    
+    Returns:
+        :double: log(sum(b*exp(a)))
+    """
+    a_max = a[0]
+    s     = b[0]
+    for i in range(1, len(a)):
+        a_max, s = logsumexp_update(a_max, s, a[i], b[i])
+    return np.log(s) + a_max
 
-@njit
-def scalar_product(v, M, n):
+@njit(cache = True, fastmath = FASTMATH_INF)
+def logsumexp_cols_jit(a, b):
+    """
+    log(sum_k b_k*exp(a_kn)) for each column n of a, evaluated in a single pass over the rows.
+    
+    Arguments:
+        :np.ndarray a: (K,N) exponents
+        :np.ndarray b: (K,) weights (one per row)
+    
+    Returns:
+        :np.ndarray: (N,) log(sum_k b_k*exp(a_kn))
+    """
+    K   = a.shape[0]
+    N   = a.shape[1]
+    out = np.empty(N, dtype = np.float64)
+    for n in range(N):
+        a_max = a[0,n]
+        s     = b[0]
+        for k in range(1, K):
+            a_max, s = logsumexp_update(a_max, s, a[k,n], b[k])
+        out[n] = np.log(s) + a_max
+    return out
+
+@njit(cache = True, fastmath = True)
+def scalar_product(v, M):
     """
     Scalar product: v*M*v^T
     
     Arguments:
         :np.ndarray v: array
         :np.ndarray M: matrix
-        :int n:        len(v)
     
     Returns:
         :double: v*M*v^T
     """
-    res = 0.
-    for i in prange(n):
-        for j in prange(n):
-            res = res + M[i,j]*v[i]*v[j]
-    return res
+    return v @ (M @ v)
+
+@njit(cache = True, fastmath = True)
+def solve_triangular_jit(L, b):
+    """
+    Solves L*y = b by forward substitution
+    
+    Arguments:
+        :np.ndarray L: lower triangular matrix (e.g. Cholesky factor)
+        :np.ndarray b: array
+    
+    Returns:
+        :np.ndarray: L^-1*b
+    """
+    n = len(b)
+    y = np.empty(n, dtype = np.float64)
+    for i in range(n):
+        y[i] = (b[i] - np.sum(L[i,:i]*y[:i]))/L[i,i]
+    return y
+
+@njit(cache = True, fastmath = True)
+def cholesky_jit(S, L):
+    """
+    Cholesky decomposition (Cholesky-Banachiewicz), written into a preallocated matrix.
+    
+    Arguments:
+        :np.ndarray S: symmetric positive-definite matrix
+        :np.ndarray L: matrix where the lower triangular factor is stored (upper triangle is left untouched)
+    """
+    D = S.shape[-1]
+    for i in range(D):
+        for j in range(i+1):
+            acc = S[i,j]
+            for l in range(j):
+                acc -= L[i,l]*L[j,l]
+            if i == j:
+                if not acc > 0.:
+                    raise np.linalg.LinAlgError("Matrix is not positive definite.")
+                L[i,i] = np.sqrt(acc)
+            else:
+                L[i,j] = acc/L[j,j]
+
+@njit(cache = True, fastmath = True)
+def cholesky_batch_jit(S):
+    """
+    Cholesky decomposition of a stack of matrices, in a single pass.
+    Avoids one LAPACK dispatch per matrix, which dominates for small D.
+    
+    Arguments:
+        :np.ndarray S: (K,D,D) stack of symmetric positive-definite matrices
+    
+    Returns:
+        :np.ndarray: (K,D,D) stack of lower triangular factors
+    """
+    K = S.shape[0]
+    D = S.shape[-1]
+    L = np.zeros((K, D, D), dtype = np.float64)
+    for k in range(K):
+        cholesky_jit(S[k], L[k])
+    return L
+
+@njit(cache = True, fastmath = True)
+def maha_chol(x, mu, L, y, D):
+    """
+    Squared Mahalanobis distance via forward substitution L*y = x - mu, using a preallocated scratch array (no allocations).
+    
+    Arguments:
+        :np.ndarray x:  value
+        :np.ndarray mu: mean vector
+        :np.ndarray L:  (D,D) Cholesky factor of the covariance matrix
+        :np.ndarray y:  (D,) scratch array for the forward substitution
+        :int D:         number of dimensions
+    
+    Returns:
+        :double: (x-mu)^T*cov^-1*(x-mu)
+    """
+    maha = 0.
+    for i in range(D):
+        acc = x[i] - mu[i]
+        for j in range(i):
+            acc -= L[i,j]*y[j]
+        y[i]  = acc/L[i,i]
+        maha += y[i]*y[i]
+    return maha
+
+@njit(cache = True, fastmath = True)
+def logdet_chol(L, D):
+    """
+    Half log-determinant of a matrix from its Cholesky factor.
+    
+    Arguments:
+        :np.ndarray L: (D,D) Cholesky factor
+        :int D:        number of dimensions
+    
+    Returns:
+        :double: sum(log(diag(L))) = 0.5*log(det(L*L^T))
+    """
+    logdet = 0.
+    for i in range(D):
+        logdet += np.log(L[i,i])
+    return logdet
 
-@jit
+@njit(cache = True, fastmath = True)
+def log_norm_chol(x, mu, cov, L, y):
+    """
+    Multivariate Normal logpdf via Cholesky decomposition, using preallocated scratch arrays (no allocations).
+    
+    Arguments:
+        :np.ndarray x:   value
+        :np.ndarray mu:  mean vector
+        :np.ndarray cov: covariance matrix
+        :np.ndarray L:   (D,D) scratch matrix for the Cholesky factor
+        :np.ndarray y:   (D,) scratch array for the forward substitution
+    
+    Returns:
+        :double: MultivariateNormal(mu,cov).logpdf(x)
+    """
+    D = len(mu)
+    cholesky_jit(cov, L)
+    return -0.5*maha_chol(x, mu, L, y, D) - 0.5*D*LOG2PI - logdet_chol(L, D)
+
+@njit(cache = True, fastmath = True)
 def log_norm_1d(x, m, s):
     """
     1D Normal logpdf
@@ -55,10 +236,60 @@ def log_norm_1d(x, m, s):
     """
     return -(x-m)**2/(2*s) - 0.5*np.log(2*np.pi*s)
 
-@jit
+@njit(cache = True, fastmath = True)
+def log_norm_2d(x, mu, cov):
+    """
+    2D Normal logpdf (closed-form inverse and determinant)
+    
+    Arguments:
+        :np.ndarray x: value
+        :np.ndarray m: mean vector
+        :np.ndarray s: covariance matrix
+    
+    Returns:
+        :double: MultivariateNormal(m,s).logpdf(x)
+    """
+    d0   = x[0]-mu[0]
+    d1   = x[1]-mu[1]
+    det  = cov[0,0]*cov[1,1] - cov[0,1]*cov[1,0]
+    maha = (cov[1,1]*d0*d0 - (cov[0,1]+cov[1,0])*d0*d1 + cov[0,0]*d1*d1)/det
+    return -0.5*maha - LOG2PI - 0.5*np.log(det)
+
+@njit(cache = True, fastmath = True)
+def log_norm_3d(x, mu, cov):
+    """
+    3D Normal logpdf (closed-form inverse and determinant, Sarrus' rule)
+    
+    Arguments:
+        :np.ndarray x: value
+        :np.ndarray m: mean vector
+        :np.ndarray s: covariance matrix
+    
+    Returns:
+        :double: MultivariateNormal(m,s).logpdf(x)
+    """
+    d0  = x[0]-mu[0]
+    d1  = x[1]-mu[1]
+    d2  = x[2]-mu[2]
+    # Cofactors
+    c00 = cov[1,1]*cov[2,2] - cov[1,2]*cov[2,1]
+    c01 = cov[1,2]*cov[2,0] - cov[1,0]*cov[2,2]
+    c02 = cov[1,0]*cov[2,1] - cov[1,1]*cov[2,0]
+    c10 = cov[0,2]*cov[2,1] - cov[0,1]*cov[2,2]
+    c11 = cov[0,0]*cov[2,2] - cov[0,2]*cov[2,0]
+    c12 = cov[0,1]*cov[2,0] - cov[0,0]*cov[2,1]
+    c20 = cov[0,1]*cov[1,2] - cov[0,2]*cov[1,1]
+    c21 = cov[0,2]*cov[1,0] - cov[0,0]*cov[1,2]
+    c22 = cov[0,0]*cov[1,1] - cov[0,1]*cov[1,0]
+    det  = cov[0,0]*c00 + cov[0,1]*c01 + cov[0,2]*c02
+    maha = (d0*(c00*d0 + c01*d1 + c02*d2) + d1*(c10*d0 + c11*d1 + c12*d2) + d2*(c20*d0 + c21*d1 + c22*d2))/det
+    return -0.5*maha - 1.5*LOG2PI - 0.5*np.log(det)
+
+@njit(cache = True, fastmath = True)
 def log_norm(x, mu, cov):
     """
     Multivariate Normal logpdf
+    Closed-form expressions are used for D = 1, 2, 3, Cholesky decomposition otherwise.
     
     Arguments:
         :np.ndarray x: value
@@ -68,32 +299,103 @@ def log_norm(x, mu, cov):
     Returns:
         :double: MultivariateNormal(m,s).logpdf(x)
     """
-    inv_cov  = inv_jit(cov)
-    exponent = -0.5*scalar_product(x-mu, inv_cov, len(mu))
-    lognorm  = 0.5*len(mu)*LOG2PI+0.5*logdet_jit(cov)
+    D = len(mu)
+    if D == 1:
+        return log_norm_1d(x[0], mu[0], cov[0,0])
+    if D == 2:
+        return log_norm_2d(x, mu, cov)
+    if D == 3:
+        return log_norm_3d(x, mu, cov)
+    L        = np.linalg.cholesky(cov)
+    y        = solve_triangular_jit(L, x-mu)
+    exponent = -0.5*np.sum(y*y)
+    lognorm  = 0.5*len(mu)*LOG2PI+np.sum(np.log(np.diag(L)))
     return -lognorm+exponent
 
+def pack_mixture(means, covs):
+    """
+    Stores the parameters of a mixture as contiguous arrays, ready for the MC-draws kernels.
+    For D = 1, the variances are stored as a flat array instead of a (K,1,1) tensor.
+    
+    Arguments:
+        :np.ndarray means: means of the mixture components
+        :np.ndarray covs:  covariance matrices of the mixture components
+    
+    Returns:
+        :np.ndarray: means (flat for D = 1)
+        :np.ndarray: variances (D = 1) or covariance matrices
+    """
+    if covs.shape[-1] == 1:
+        return np.ascontiguousarray(means[:,0]), np.ascontiguousarray(covs[:,0,0])
+    return np.ascontiguousarray(means), np.ascontiguousarray(covs)
+
+@njit(cache = True, fastmath = True)
+def log_norm_components_chol(x, means, L):
+    """
+    Computes log N(x_n| means_k, covs_k) for all the points and all the components of a mixture, given the Cholesky factors of the covariance matrices.
+    
+    Arguments:
+        :np.ndarray x:     (N,D) points
+        :np.ndarray means: (K,D) means of the mixture components
+        :np.ndarray L:     (K,D,D) Cholesky factors of the covariance matrices of the mixture components
+    
+    Returns:
+        :np.ndarray: (K,N) logpdf of each component at each point
+    """
+    out = np.empty((means.shape[0], x.shape[0]), dtype = np.float64)
+    log_norm_components_chol_out(x, means, L, out)
+    return out
+
+@njit(cache = True, fastmath = True, parallel = True)
+def log_norm_components_chol_out(x, means, L, out):
+    """
+    Same as log_norm_components_chol, writing the result into a preallocated array.
+    
+    Arguments:
+        :np.ndarray x:     (N,D) points
+        :np.ndarray means: (K,D) means of the mixture components
+        :np.ndarray L:     (K,D,D) Cholesky factors of the covariance matrices of the mixture components
+        :np.ndarray out:   (K,N) output array
+    """
+    K      = means.shape[0]
+    N      = x.shape[0]
+    D      = means.shape[-1]
+    logdet = np.empty(K, dtype = np.float64)
+    for k in range(K):
+        logdet[k] = logdet_chol(L[k], D)
+    for n in prange(N):
+        y = np.empty(D, dtype = np.float64)
+        for k in range(K):
+            out[k,n] = -0.5*maha_chol(x[n], means[k], L[k], y, D) - 0.5*D*LOG2PI - logdet[k]
+
 #------------#
 # 1D methods #
 #------------#
 
-@jit
-def eval_mix_1d(mu, sigma, means, covs):
+@njit(cache = True, fastmath = True)
+def eval_mix_1d(mu, sigma, means, vars):
     """
     Computes N(mu_k| mu, (sigma_k^2+sigma^2) for all the components of a mixture (for predictive likelihood, 1D).
     
     Arguments:
         :np.ndarray mu:    temptative mean of the parent mixture component
         :np.ndarray sigma: temptative variance of the parent mixture component
-        :np.ndarray means: means of the event mixture components
-        :np.ndarray vars:  variances of the event mixture components
+        :np.ndarray means: means of the event mixture components (flat, see pack_mixture)
+        :np.ndarray vars:  variances of the event mixture components (flat, see pack_mixture)
     
     Returns:
         :np.ndarray: probability for each event mixture components
     """
-    return np.array([log_norm_1d(means[i,0], mu, sigma+covs[i,0,0]) for i in prange(len(means))])
+    K   = len(means)
+    out = np.empty(K, dtype = np.float64)
+    for k in range(K):
+        s      = sigma + vars[k]
+        inv_s  = 1./s
+        diff   = means[k] - mu
+        out[k] = -0.5*diff*diff*inv_s - 0.5*(LOG2PI + np.log(s))
+    return out
 
-@jit
+@njit(cache = True, fastmath = True, parallel = True)
 def evaluate_mixture_MC_draws_1d(mu, sigma, means, vars, w):
     """
     Computes N(mu_k| mu, (sigma_k^2+sigma^2) for a set of MC draws for mu and sigma.
@@ -101,23 +403,37 @@ def evaluate_mixture_MC_draws_1d(mu, sigma, means, vars, w):
     Arguments:
         :np.ndarray mu:    MC draws for the mean of the parent mixture component
         :np.ndarray sigma: MC draws for the variance of the parent mixture component
-        :np.ndarray means: means of the event mixture components
-        :np.ndarray vars:  variances of the event mixture components
+        :np.ndarray means: means of the event mixture components (flat, see pack_mixture)
+        :np.ndarray vars:  variances of the event mixture components (flat, see pack_mixture)
         :np.ndarray w:     component weights
     
     Returns:
         :np.ndarray: probability for each MC draw
     """
-    logP = np.zeros(len(mu), dtype = np.float64)
-    for i in prange(len(mu)):
-        logP[i] = logsumexp_jit(eval_mix_1d(mu[i], sigma[i], means, vars), b = w)
+    M    = len(mu)
+    K    = len(means)
+    logP = np.empty(M, dtype = np.float64)
+    for i in prange(M):
+        # One sweep over the components: the logsumexp is accumulated on the fly
+        a_max = 0.
+        l_sum = 0.
+        for j in range(K):
+            s    = sigma[i] + vars[j]
+            diff = means[j] - mu[i]
+            logN = -0.5*diff*diff/s - 0.5*(LOG2PI + np.log(s))
+            if j == 0:
+                a_max = logN
+                l_sum = w[0]
+            else:
+                a_max, l_sum = logsumexp_update(a_max, l_sum, logN, w[j])
+        logP[i] = np.log(l_sum) + a_max
     return logP
 
 #------------#
 # ND methods #
 #------------#
 
-@jit
+@njit(cache = True, fastmath = True)
 def eval_mix(mu, sigma, means, covs):
     """
     Computes N(mu_k| mu, (sigma_k^2+sigma^2) for all the components of a mixture (for predictive likelihood, ND).
@@ -131,9 +447,16 @@ def eval_mix(mu, sigma, means, covs):
     Returns:
         :np.ndarray: probability for each event mixture components
     """
-    return np.array([log_norm(means[i], mu, sigma+covs[i]) for i in prange(len(means))])
+    K   = len(means)
+    D   = means.shape[-1]
+    L   = cholesky_batch_jit(sigma + covs)
+    out = np.empty(K, dtype = np.float64)
+    y   = np.empty(D, dtype = np.float64)
+    for k in range(K):
+        out[k] = -0.5*maha_chol(means[k], mu, L[k], y, D) - 0.5*D*LOG2PI - logdet_chol(L[k], D)
+    return out
 
-@jit
+@njit(cache = True, fastmath = True, parallel = True)
 def evaluate_mixture_MC_draws(mu, sigma, means, covs, w):
     """
     Computes N(mu_k| mu, (sigma_k^2+sigma^2) for a set of MC draws for mu and sigma.
@@ -148,7 +471,79 @@ def evaluate_mixture_MC_draws(mu, sigma, means, covs, w):
     Returns:
         :np.ndarray: probability for each MC draw
     """
-    logP = np.zeros(len(mu), dtype = np.float64)
-    for i in prange(len(mu)):
-        logP[i] = logsumexp_jit(eval_mix(mu[i], sigma[i], means, covs), b = w)
+    M       = len(mu)
+    K       = len(means)
+    D       = means.shape[-1]
+    means_c = np.ascontiguousarray(means)
+    covs_c  = np.ascontiguousarray(covs)
+    logP    = np.empty(M, dtype = np.float64)
+    for i in prange(M):
+        # Scratch arrays for sigma_i + covs_j and its factorisation, shared by all components
+        S     = np.zeros((D, D), dtype = np.float64)
+        L     = np.zeros((D, D), dtype = np.float64)
+        y     = np.empty(D, dtype = np.float64)
+        a_max = 0.
+        l_sum = 0.
+        for j in range(K):
+            # Element-wise, so that no temporary (D,D) array is allocated
+            for r in range(D):
+                for c in range(D):
+                    S[r,c] = sigma[i,r,c] + covs_c[j,r,c]
+            if D > 3:
+                logN = log_norm_chol(means_c[j], mu[i], S, L, y)
+            else:
+                logN = log_norm(means_c[j], mu[i], S)
+            if j == 0:
+                a_max = logN
+                l_sum = w[0]
+            else:
+                a_max, l_sum = logsumexp_update(a_max, l_sum, logN, w[j])
+        logP[i] = np.log(l_sum) + a_max
     return logP
+
+@lru_cache(maxsize = None)
+def make_evaluate_mixture_MC_draws(D):
+    """
+    Builds a version of evaluate_mixture_MC_draws (Cholesky path) compiled for a fixed number of dimensions.
+    D is a compile-time constant for the returned function, so that the D-length loops can be fully unrolled.
+    Useful for D > 3 (closed-form expressions are used otherwise). Compiled functions are cached by D.
+    
+    Arguments:
+        :int D: number of dimensions
+    
+    Returns:
+        :callable: evaluate_mixture_MC_draws(mu, sigma, means, covs, w) for D-dimensional mixtures
+    """
+    half_D_log2pi = 0.5*D*LOG2PI
+    
+    @njit(fastmath = True)
+    def log_norm_fixed_D(x, mu, cov, L, y):
+        # Shared kernels: once inlined, D is a constant for their loops too
+        cholesky_jit(cov, L)
+        return -0.5*maha_chol(x, mu, L, y, D) - half_D_log2pi - logdet_chol(L, D)
+    
+    @njit(fastmath = True, parallel = True)
+    def evaluate_mixture_MC_draws_fixed_D(mu, sigma, means, covs, w):
+        M    = len(mu)
+        K    = len(means)
+        logP = np.empty(M, dtype = np.float64)
+        for i in prange(M):
+            S     = np.zeros((D, D), dtype = np.float64)
+            L     = np.zeros((D, D), dtype = np.float64)
+            y     = np.empty(D, dtype = np.float64)
+            a_max = 0.
+            l_sum = 0.
+            for j in range(K):
+                for r in range(D):
+                    for c in range(D):
+                        S[r,c] = sigma[i,r,c] + covs[j,r,c]
+                logN = log_norm_fixed_D(means[j], mu[i], S, L, y)
+                if j == 0:
+                    a_max = logN
+                    l_sum = w[0]
+                else:
+                    a_max, l_sum = logsumexp_update(a_max, l_sum, logN, w[j])
+            logP[i] = np.log(l_sum) + a_max
+        return logP
+    
+    return evaluate_mixture_MC_draws_fixed_D
@@ -0,0 +1,77 @@
+# encoding: utf-8
+# cython: profile=False
+# cython: linetrace=False
+# cython: language_level=3, cdivision=True, boundscheck=False, wraparound=False, binding=True, embedsignature=True
+import numpy as np
+cimport numpy as np
+from cython.parallel cimport prange
+from libc.math cimport log, exp
+from numba import get_num_threads
+
+cdef double LOG2PI = log(2*3.141592653589793)
+
+# The MC draws can be stored in single precision (see HDPGMM(dtype = np.float32))
+ctypedef fused real_t:
+    float
+    double
+
+def evaluate_mixture_MC_draws_1d(real_t[::1] mu, real_t[::1] sigma, double[::1] means, double[::1] vars, double[::1] w):
+    """
+    Computes N(mu_k| mu, (sigma_k^2+sigma^2) for a set of MC draws for mu and sigma (1D, compiled counterpart of figaro.likelihood.evaluate_mixture_MC_draws_1d).
+
+    Arguments:
+        :np.ndarray mu:    MC draws for the mean of the parent mixture component (float32 or float64)
+        :np.ndarray sigma: MC draws for the variance of the parent mixture component (float32 or float64)
+        :np.ndarray means: means of the event mixture components (flat, see figaro.likelihood.pack_mixture)
+        :np.ndarray vars:  variances of the event mixture components (flat, see figaro.likelihood.pack_mixture)
+        :np.ndarray w:     component weights
+
+    Returns:
+        :np.ndarray: probability for each MC draw
+    """
+    cdef Py_ssize_t M = mu.shape[0]
+    cdef Py_ssize_t K = means.shape[0]
+    cdef Py_ssize_t i
+    cdef np.ndarray[double, ndim=1, mode="c"] logP = np.zeros(M, dtype = np.double)
+    cdef double[::1] logP_view = logP
+    # Same number of threads as the numba kernels (see figaro.utils.init_worker), rather than OMP_NUM_THREADS
+    cdef int n_threads = get_num_threads()
+    for i in prange(M, nogil = True, schedule = 'static', num_threads = n_threads):
+        logP_view[i] = _eval_draw(mu[i], sigma[i], means, vars, w, K)
+    return logP
+
+cdef inline double _eval_draw(double mu, double sigma, double[::1] means, double[::1] vars, double[::1] w, Py_ssize_t K) nogil:
+    """
+    log(sum_k w_k*N(mu_k| mu, (sigma_k^2+sigma^2)) for a single MC draw (single-pass logsumexp)
+
+    Arguments:
+        :double mu:        MC draw for the mean
+        :double sigma:     MC draw for the variance
+        :np.ndarray means: means of the event mixture components
+        :np.ndarray vars:  variances of the event mixture components
+        :np.ndarray w:     component weights
+        :int K:            number of components
+
+    Returns:
+        :double: log probability
+    """
+    cdef Py_ssize_t j
+    cdef double s, diff, logN
+    cdef double a_max = 0.
+    cdef double l_sum = 0.
+    for j in range(K):
+        s    = sigma + vars[j]
+        diff = means[j] - mu
+        logN = -0.5*diff*diff/s - 0.5*(LOG2PI + log(s))
+        if j == 0:
+            a_max = logN
+            l_sum = w[0]
+        elif logN > a_max:
+            l_sum = l_sum*exp(a_max - logN) + w[j]
+            a_max = logN
+        elif logN == a_max:
+            # Also covers logN = a_max = -inf, where exp(logN - a_max) would be NaN (as in figaro.likelihood.logsumexp_update)
+            l_sum = l_sum + w[j]
+        else:
+            l_sum = l_sum + w[j]*exp(logN - a_max)
+    return log(l_sum) + a_max
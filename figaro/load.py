@@ -385,7 +385,8 @@ def save_density(density, folder = '.', name = 'density'):
         :string or Path folder:  The folder in which the output json file will be saved.
         :string name:            Name to be given to output file.
     """
-    dict_ = density.__dict__.copy()
+    # Private attributes are caches computed from the mixture parameters
+    dict_ = {key: value for key, value in density.__dict__.items() if not key.startswith('_')}
 
     for key in dict_.keys():
         value = dict_[key]
@@ -413,7 +414,8 @@ def load_density(file):
         dictjson = json.load(fjson)
 
     dict_ = json.loads(dictjson)
-    dict_.pop('log_w')
+    # Files saved with older versions also store log_w
+    dict_.pop('log_w', None)
 
     for key in dict_.keys():
         value = dict_[key]
@@ -17,9 +17,11 @@ def _marginalise(mix, axis = -1):
     dim    = mix.dim - len(ax)
     if dim < 1:
         raise FIGAROException("Cannot marginalise out all dimensions")
-    means  = np.delete(mix.means, ax, axis = -1)
-    covs   = np.delete(np.delete(mix.covs, ax, axis = -1), ax, axis = -2)
-    bounds = np.delete(mix.bounds, ax, axis = 0)
+    # Dimensions that are kept: the covariance sub-matrices are selected with a single indexing operation
+    keep   = np.delete(np.arange(mix.dim), ax)
+    means  = np.asarray(mix.means)[:, keep]
+    covs   = np.asarray(mix.covs)[:, keep[:,None], keep]
+    bounds = np.asarray(mix.bounds)[keep]
     
     return mixture(means, covs, mix.w, bounds, dim, mix.n_cl, mix.n_pts)
 
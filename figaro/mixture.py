@@ -2,21 +2,23 @@ import numpy as np
 import sys
 import dill
 
-from collections import Counter
 from pathlib import Path
 
-from scipy.special import gammaln, logsumexp
-from scipy.stats import multivariate_normal as mn
-from scipy.stats import invgamma, invwishart, norm
+from scipy.special import ndtr, log_ndtr
+from scipy.stats import invgamma
 
 from figaro.decorators import *
 from figaro.transform import *
-from figaro.likelihood import evaluate_mixture_MC_draws, evaluate_mixture_MC_draws_1d, logsumexp_jit, inv_jit
+from figaro.likelihood import evaluate_mixture_MC_draws, make_evaluate_mixture_MC_draws, logsumexp_cols_jit, pack_mixture, log_norm_components_chol, log_norm_components_chol_out, cholesky_batch_jit, FASTMATH_INF
+try:
+    from figaro.likelihood_1d import evaluate_mixture_MC_draws_1d
+except ImportError:
+    # Source checkout or failed (OpenMP) build: numba counterpart
+    from figaro.likelihood import evaluate_mixture_MC_draws_1d
 from figaro.exceptions import except_hook, FIGAROException
 
-from numba import jit, njit, prange
-from numba.extending import get_cython_function_address
-import ctypes
+from numba import njit, prange
+from math import lgamma
 
 #-----------#
 # Utilities #
@@ -24,28 +26,16 @@ import ctypes
 
 sys.excepthook = except_hook
 
-"""
-See https://stackoverflow.com/a/54855769
-Wrapper (based on https://github.com/numba/numba/issues/3086) for scipy's cython implementation of gammaln.
-"""
-
-_PTR = ctypes.POINTER
-_dble = ctypes.c_double
-_ptr_dble = _PTR(_dble)
-
-addr = get_cython_function_address("scipy.special.cython_special", "gammaln")
-functype = ctypes.CFUNCTYPE(_dble, _dble)
-gammaln_float64 = functype(addr)
-
 #-----------#
 # Functions #
 #-----------#
 
-@njit
+@njit(cache = True, fastmath = True)
 def _numba_gammaln(x):
-    return gammaln_float64(x)
+    # math.lgamma is a numba intrinsic: unlike a ctypes wrapper, it can be inlined and cached
+    return lgamma(x)
 
-@jit
+@njit(cache = True, fastmath = FASTMATH_INF, error_model = 'numpy')
 def _student_t(df, t, mu, sigma, dim):
     """
     Multivariate student-t pdf.
@@ -61,23 +51,183 @@ def _student_t(df, t, mu, sigma, dim):
     Returns:
         :float: student_t(df).logpdf(t)
     """
-    vals, vecs = np.linalg.eigh(sigma)
-    logdet     = np.log(vals).sum()
-    valsinv    = np.array([1./v for v in vals])
-    U          = vecs * np.sqrt(valsinv)
-    dev        = t - mu
-    maha       = np.square(np.dot(dev, U)).sum(axis=-1)
+    L     = np.linalg.cholesky(sigma)
+    log_c = _numba_gammaln(0.5*(df + dim)) - _numba_gammaln(0.5*df) - 0.5*dim*np.log(df*np.pi) - np.log(np.diag(L)).sum()
+    return _student_t_chol(t[0], mu[0], L, df, log_c, dim)
 
-    x = 0.5 * (df + dim)
-    A = _numba_gammaln(x)
-    B = _numba_gammaln(0.5 * df)
-    C = dim/2. * np.log(df * np.pi)
-    D = 0.5 * logdet
-    E = -x * np.log1p((1./df) * maha)
+@njit(cache = True, fastmath = FASTMATH_INF, error_model = 'numpy')
+def _student_t_1d(df, t, mu, s):
+    """
+    Univariate student-t logpdf, with scalar arithmetic only.
+    
+    Arguments:
+        :float df: degrees of freedom
+        :float t:  variable
+        :float mu: mean
+        :float s:  variance
+        
+    Returns:
+        :float: student_t(df).logpdf(t)
+    """
+    return _numba_gammaln(0.5*(df + 1.)) - _numba_gammaln(0.5*df) - 0.5*np.log(df*np.pi*s) - 0.5*(df + 1.)*np.log1p((t - mu)**2/(df*s))
 
-    return (A - B - C - D + E)[0]
+@njit(cache = True, fastmath = FASTMATH_INF, error_model = 'numpy')
+def _student_t_chol(t, mu, L, df, log_c, dim):
+    """
+    Multivariate student-t logpdf with precomputed Cholesky factor of the scale matrix and normalisation constant (see _student_t_chol_pars).
+    As in http://gregorygundersen.com/blog/2020/01/20/multivariate-t/
+    
+    Arguments:
+        :np.ndarray t:  variable (1d array)
+        :np.ndarray mu: mean (1d array)
+        :np.ndarray L:  Cholesky factor of the scale matrix
+        :float df:      degrees of freedom
+        :float log_c:   log normalisation constant
+        :int dim:       number of dimensions
+        
+    Returns:
+        :float: student_t(df).logpdf(t)
+    """
+    # Mahalanobis distance via forward substitution L*z = t - mu
+    z    = np.empty(dim)
+    maha = 0.
+    for i in range(dim):
+        acc = t[i] - mu[i]
+        for j in range(i):
+            acc -= L[i,j]*z[j]
+        z[i]  = acc/L[i,i]
+        maha += z[i]*z[i]
+    return log_c - 0.5*(df + dim)*np.log1p(maha/df)
+
+@njit(cache = True, fastmath = True)
+def _student_t_chol_pars(k, mu, nu, L, mean, S, N, dim):
+    """
+    Parameters of the student-t predictive distribution of a component, with the Cholesky factor of the scale matrix and the log normalisation constant.
+    These change only when a sample is added to the component.
+    
+    Arguments:
+        :double k:        Normal std parameter (for NIW)
+        :np.ndarray mu:   Normal mean parameter (for NIW)
+        :int nu:          Inverse-Wishart df parameter (for NIW)
+        :np.ndarray L:    Inverse-Wishart scale matrix (for NIW)
+        :np.ndarray mean: samples mean (2d array)
+        :np.ndarray S:    samples covariance
+        :int N:           number of samples
+        :int dim:         number of dimensions
+    
+    Returns:
+        :double:     degrees of freedom for student-t
+        :np.ndarray: mean for student-t
+        :np.ndarray: Cholesky factor of the scale matrix for student-t
+        :double:     log normalisation constant for student-t
+    """
+    t_df, t_shape, mu_n = compute_t_pars(k, mu, nu, L, mean, S, N, dim)
+    t_L   = np.linalg.cholesky(t_shape)
+    log_c = _numba_gammaln(0.5*(t_df + dim)) - _numba_gammaln(0.5*t_df) - 0.5*dim*np.log(t_df*np.pi) - np.log(np.diag(t_L)).sum()
+    return t_df, mu_n[0], t_L, log_c
+
+@njit(cache = True, fastmath = FASTMATH_INF, error_model = 'numpy')
+def _log_predictive_likelihood_batch(x, t_mu, t_L, t_df, t_log_c, n_cl, new_pars, dim):
+    """
+    Log predictive likelihood (multivariate student-t) of a sample for all the existing components and for a new component, in a single call.
+    
+    Arguments:
+        :np.ndarray x:       sample (1d array)
+        :np.ndarray t_mu:    (n_cl,dim) student-t means
+        :np.ndarray t_L:     (n_cl,dim,dim) Cholesky factors of the student-t scale matrices
+        :np.ndarray t_df:    (n_cl,) student-t degrees of freedom
+        :np.ndarray t_log_c: (n_cl,) student-t log normalisation constants
+        :int n_cl:           number of components
+        :tuple new_pars:     student-t parameters (df, mu, L, log_c) for a new component
+        :int dim:            number of dimensions
+    
+    Returns:
+        :np.ndarray: (n_cl+1,) log predictive likelihoods (the last one is for a new component)
+    """
+    out = np.empty(n_cl+1)
+    for i in range(n_cl):
+        out[i] = _student_t_chol(x, t_mu[i], t_L[i], t_df[i], t_log_c[i], dim)
+    out[n_cl] = _student_t_chol(x, new_pars[1], new_pars[2], new_pars[0], new_pars[3], dim)
+    return out
+
+@njit(cache = True, fastmath = FASTMATH_INF)
+def _normalise_log_scores(log_scores):
+    """
+    Normalised probabilities from unnormalised log scores, in two passes over the scores.
+    Scores that are +inf or NaN get probability 0. If no score is finite, returns NaNs.
+    
+    Arguments:
+        :np.ndarray log_scores: unnormalised log scores
+    
+    Returns:
+        :np.ndarray: normalised probabilities
+    """
+    n     = len(log_scores)
+    out   = np.empty(n)
+    s_max = -np.inf
+    # s < inf checks also for NaNs
+    for i in range(n):
+        if log_scores[i] < np.inf and log_scores[i] > s_max:
+            s_max = log_scores[i]
+    if s_max == -np.inf:
+        out[:] = np.nan
+        return out
+    tot = 0.
+    for i in range(n):
+        if log_scores[i] < np.inf:
+            out[i] = np.exp(log_scores[i] - s_max)
+        else:
+            out[i] = 0.
+        tot += out[i]
+    out /= tot
+    return out
+
+@njit(cache = True, fastmath = FASTMATH_INF, parallel = True)
+def _log_assignment_scores_h(logL_D, logL_x, log_norm_D, log_N, log_alpha):
+    """
+    Unnormalised log probabilities of assigning an event to each existing component of a HDPGMM and to a new component, in a single call.
+    
+    Arguments:
+        :np.ndarray logL_D:     (n_cl,MC_draws) log likelihood of the events already in each component, for each MC draw
+        :np.ndarray logL_x:     (MC_draws,) log likelihood of the new event for each MC draw
+        :np.ndarray log_norm_D: (n_cl,) log(sum(exp(logL_D))) for each component
+        :np.ndarray log_N:      (n_cl,) log number of events in each component
+        :double log_alpha:      log concentration parameter
+    
+    Returns:
+        :np.ndarray: (n_cl+1,) log scores (the last one is for a new component)
+        :np.ndarray: (n_cl+1,MC_draws) logL_D + logL_x for each component (the new component has logL_D = 0)
+        :np.ndarray: (n_cl+1,) log(sum(exp(logL_D + logL_x))) for each component
+    """
+    n_cl     = logL_D.shape[0]
+    M        = logL_x.shape[0]
+    scores   = np.empty(n_cl+1)
+    logL_N   = np.empty((n_cl+1, M))
+    log_norm = np.empty(n_cl+1)
+    for i in prange(n_cl+1):
+        a_max = -np.inf
+        for j in range(M):
+            if i < n_cl:
+                logL_N[i,j] = logL_D[i,j] + logL_x[j]
+            else:
+                logL_N[i,j] = logL_x[j]
+            if logL_N[i,j] > a_max:
+                a_max = logL_N[i,j]
+        if a_max == -np.inf:
+            lse = -np.inf
+        else:
+            s = 0.
+            for j in range(M):
+                s += np.exp(logL_N[i,j] - a_max)
+            lse = a_max + np.log(s)
+        log_norm[i] = lse
+        if i < n_cl:
+            scores[i] = lse - log_norm_D[i] + log_N[i]
+        else:
+            scores[i] = lse - np.log(M) + log_alpha
+    return scores, logL_N, log_norm
 
-@jit
+@njit(cache = True, fastmath = FASTMATH_INF)
 def update_alpha(alpha, n, K, burnin = 1000):
     """
     Update concentration parameter using a Metropolis-Hastings sampling scheme.
@@ -91,18 +241,22 @@ def update_alpha(alpha, n, K, burnin = 1000):
     Returns:
         :double: new concentration parameter value
     """
-    a_old = alpha
-    n_draws = burnin+np.random.randint(100)
-    for i in prange(n_draws):
-        a_new = a_old + (np.random.random() - 0.5)
+    a_old    = alpha
+    n_draws  = burnin+np.random.randint(100)
+    delta    = np.random.random(n_draws) - 0.5
+    log_u    = np.log(np.random.random(n_draws))
+    # logP_old changes only when a proposal is accepted: no need to recompute it at every step
+    logP_old = _numba_gammaln(a_old) - _numba_gammaln(a_old + n) + K * np.log(a_old) - 1./a_old
+    for i in range(n_draws):
+        a_new = a_old + delta[i]
         if a_new > 0.:
-            logP_old = _numba_gammaln(a_old) - _numba_gammaln(a_old + n) + K * np.log(a_old) - 1./a_old
             logP_new = _numba_gammaln(a_new) - _numba_gammaln(a_new + n) + K * np.log(a_new) - 1./a_new
-            if logP_new - logP_old > np.log(np.random.random()):
-                a_old = a_new
+            if logP_new - logP_old > log_u[i]:
+                a_old    = a_new
+                logP_old = logP_new
     return a_old
 
-@jit
+@njit(cache = True, fastmath = True)
 def compute_t_pars(k, mu, nu, L, mean, S, N, dim):
     """
     Compute parameters for student-t distribution.
@@ -129,7 +283,7 @@ def compute_t_pars(k, mu, nu, L, mean, S, N, dim):
     t_shape = L_n*(k_n+1)/(k_n*t_df)
     return t_df, t_shape, mu_n
 
-@jit
+@njit(cache = True, fastmath = True)
 def compute_hyperpars(k, mu, nu, L, mean, S, N):
     """
     Update hyperparameters for Normal Inverse Gamma/Wishart (NIG/NIW).
@@ -156,7 +310,7 @@ def compute_hyperpars(k, mu, nu, L, mean, S, N):
     L_n  = L + S + k*N*((mean - mu).T@(mean - mu))/k_n
     return k_n, mu_n, nu_n, L_n
 
-@jit
+@njit(cache = True, fastmath = True)
 def compute_component_suffstats(x, mean, S, N, p_mu, p_k, p_nu, p_L):
     """
     Update mean, covariance, number of samples and maximum a posteriori for mean and covariance.
@@ -186,6 +340,158 @@ def compute_component_suffstats(x, mean, S, N, p_mu, p_k, p_nu, p_L):
     
     return new_mean, new_S, new_N, new_mu, new_sigma
 
+def _draw_components(means, L, idx):
+    """
+    Draw one sample from each of the components listed in idx, using the Cholesky factors of their covariances.
+    
+    Arguments:
+        :np.ndarray means: (n_cl,dim) component means
+        :np.ndarray L:     (n_cl,dim,dim) Cholesky factors of the component covariances
+        :np.ndarray idx:   (n_samps,) component indices
+    
+    Returns:
+        :np.ndarray: (n_samps,dim) samples
+    """
+    z = np.random.normal(size = (len(idx), means.shape[-1]))
+    return means[idx] + np.einsum('nij,nj->ni', L[idx], z)
+
+@njit(cache = True, fastmath = True)
+def update_component_suffstats(x, mean, S, N, mu, sigma, chol, p_mu, p_k, p_nu, p_L):
+    """
+    Update in place mean, covariance and maximum a posteriori for mean and covariance after adding a sample (Welford's algorithm).
+    The Cholesky factor of the covariance is updated with a rank-1 update of the NIW scale matrix, Psi_new = Psi + k_n/(k_n+1)*(x-mu)(x-mu)^T.
+    It is recomputed from scratch when the component has a single sample (its covariance is not the NIW one) and every 100 samples, for numerical safety.
+    
+    Arguments:
+        :np.ndarray x:     (1,dim) sample to add
+        :np.ndarray mean:  (1,dim) mean of samples already in the cluster (updated in place)
+        :np.ndarray S:     (dim,dim) scatter matrix of samples already in the cluster (updated in place)
+        :int N:            number of samples already in the cluster
+        :np.ndarray mu:    (dim,) mean, maximum a posteriori (updated in place)
+        :np.ndarray sigma: (dim,dim) covariance, maximum a posteriori (updated in place)
+        :np.ndarray chol:  (dim,dim) Cholesky factor of sigma (updated in place)
+        :np.ndarray p_mu:  NIG Normal mean parameter
+        :double p_k:       NIG Normal std parameter
+        :int p_nu:         NIG Gamma df parameter
+        :np.ndarray p_L:   NIG Gamma scale matrix
+    
+    Returns:
+        :int N: updated number of samples
+    """
+    dim      = x.shape[-1]
+    new_N    = N+1
+    delta    = np.empty(dim)
+    refactor = N < 2 or new_N % 100 == 0
+    if not refactor:
+        # Rank-1 update of the Cholesky factor of Psi = sigma*(p_nu + N - dim - 1), using the old mu
+        k_n     = p_k + N
+        f       = np.sqrt(k_n/(k_n + 1.))
+        old_den = np.sqrt(p_nu + N - dim - 1.)
+        new_den = np.sqrt(p_nu + new_N - dim - 1.)
+        for i in range(dim):
+            delta[i] = f*(x[0,i] - mu[i])
+            for j in range(i+1):
+                chol[i,j] *= old_den
+        _chol_rank1_update(chol, delta)
+        for i in range(dim):
+            for j in range(i+1):
+                chol[i,j] /= new_den
+    for i in range(dim):
+        delta[i]   = x[0,i] - mean[0,i]
+        mean[0,i] += delta[i]/new_N
+    for i in range(dim):
+        for j in range(dim):
+            S[i,j] += delta[i]*(x[0,j] - mean[0,j])
+    # delta is reused for the deviation of the mean from the prior mean
+    for i in range(dim):
+        mu[i]    = (p_mu[i]*p_k + new_N*mean[0,i])/(p_k + new_N)
+        delta[i] = mean[0,i] - p_mu[i]
+    c   = p_k*new_N/(p_k + new_N)
+    den = p_nu + new_N - dim - 1
+    for i in range(dim):
+        for j in range(dim):
+            sigma[i,j] = (p_L[i,j] + S[i,j] + c*delta[i]*delta[j])/den
+    if refactor:
+        chol[:,:] = np.linalg.cholesky(sigma)
+    return new_N
+
+@njit(cache = True, fastmath = True)
+def _chol_rank1_update(L, u):
+    """
+    Rank-1 update of a Cholesky factor: replaces L with the Cholesky factor of L@L.T + u@u.T, in O(dim^2).
+    
+    Arguments:
+        :np.ndarray L: (dim,dim) lower triangular Cholesky factor (updated in place)
+        :np.ndarray u: (dim,) update vector (overwritten)
+    """
+    dim = len(u)
+    for k in range(dim):
+        r      = np.sqrt(L[k,k]**2 + u[k]**2)
+        c      = r/L[k,k]
+        s      = u[k]/L[k,k]
+        L[k,k] = r
+        for i in range(k+1, dim):
+            L[i,k] = (L[i,k] + s*u[i])/c
+            u[i]   = c*u[i] - s*L[i,k]
+
+def _precision_deviations(x, means, L):
+    """
+    Compute the deviations of the points from the component means, multiplied by the inverse covariance matrices of the components.
+    
+    Arguments:
+        :np.ndarray x:     (N,dim) points
+        :np.ndarray means: (n_cl,dim) component means
+        :np.ndarray L:     (n_cl,dim,dim) Cholesky factors of the component covariances
+    
+    Returns:
+        :np.ndarray: (n_cl,N,dim) inv(cov_k)@(x_n - mean_k)
+    """
+    L_inv = np.linalg.inv(L)
+    prec  = np.einsum('kji,kjl->kil', L_inv, L_inv)
+    return np.einsum('kde,kne->knd', prec, x[None,:,:] - means[:,None,:])
+
+def _average_MC_draws(logL_D, log_norm_D, mu_MC, sigma_MC):
+    """
+    Mean and covariance of a hierarchical component: MC draws averaged with weights given by the likelihood of the events in the component.
+    
+    Arguments:
+        :np.ndarray logL_D:   (MC_draws,) log likelihood of the events in the component for each MC draw
+        :double log_norm_D:   log(sum(exp(logL_D)))
+        :np.ndarray mu_MC:    (MC_draws,dim) MC draws for the component mean
+        :np.ndarray sigma_MC: (MC_draws,dim,dim) MC draws for the component covariance
+    
+    Returns:
+        :np.ndarray: (dim,) mean
+        :np.ndarray: (dim,dim) covariance
+    """
+    # The weights are computed once and shared by mean and covariance
+    weights  = np.exp(logL_D - log_norm_D)
+    weights /= weights.sum()
+    return np.tensordot(weights, mu_MC, axes = 1), np.tensordot(weights, sigma_MC, axes = 1)
+
+def sample_invwishart(df, scale, size, out = None):
+    """
+    Draw samples from an inverse Wishart distribution using the Bartlett decomposition, all at once.
+    If W = C@A@A.T@C.T ~ Wishart(df, inv(scale)) with C = inv(L).T and L the Cholesky factor of scale, then inv(W) = (L@inv(A).T)@(L@inv(A).T).T.
+    
+    Arguments:
+        :double df:        degrees of freedom
+        :np.ndarray scale: (dim,dim) scale matrix
+        :int size:         number of samples
+        :np.ndarray out:   (size,dim,dim) array to store the samples in (can be single precision). If None, a new array is allocated
+    
+    Returns:
+        :np.ndarray: (size,dim,dim) samples
+    """
+    dim  = scale.shape[-1]
+    diag = np.arange(dim)
+    low  = np.tril_indices(dim, -1)
+    A    = np.zeros((size, dim, dim))
+    A[:, diag, diag]     = np.sqrt(np.random.chisquare(df - diag, size = (size, dim)))
+    A[:, low[0], low[1]] = np.random.standard_normal((size, len(low[0])))
+    U = np.einsum('ij,bkj->bik', np.linalg.cholesky(scale), np.linalg.inv(A))
+    return np.einsum('bij,bkj->bik', U, U, out = out, casting = 'same_kind')
+
 #-------------------#
 # Auxiliary classes #
 #-------------------#
@@ -223,42 +529,20 @@ class component:
     """
     def __init__(self, x, prior):
         self.N     = 1
-        self.mean  = x
-        self.S     = np.identity(x.shape[-1])*0.
-        self.mu    = np.atleast_2d((prior.mu*prior.k + self.N*self.mean)/(prior.k + self.N)).astype(np.float64)[0]
-        self.sigma = np.identity(x.shape[-1]).astype(np.float64)*prior.L/(prior.nu - x.shape[-1] - 1)
-
-class component_h:
-    """
-    Class to store the relevant informations for each component in the mixture.
-    To be used in hierarchical inference.
+        # Copy: the sufficient statistics are updated in place
+        self.mean  = np.array(x, dtype = np.float64)
+        self.S     = np.zeros((x.shape[-1], x.shape[-1]))
+        # mean is (1,dim) and float64 already: no atleast_2d or astype copies needed
+        self.mu    = ((prior.mu*prior.k + self.N*self.mean)/(prior.k + self.N))[0]
+        self.sigma = np.identity(x.shape[-1])*prior.L/(prior.nu - x.shape[-1] - 1)
+        self.update_cov_cache()
     
-    Arguments:
-        :np.ndarray x:  event added to the new component
-        :int dim:       number of dimensions
-        :prior prior:   instance of the prior class with NIG/NIW prior parameters
-        :double logL_D: logLikelihood denominator
-    
-    Returns:
-        :component_h: instance of component_h class
-    """
-    def __init__(self, x, dim, prior, logL_D, mu_MC, sigma_MC, b_ones):
-        self.dim    = dim
-        self.N      = 1
-        self.events = [x]
-        self.means  = [x.means]
-        self.covs   = [x.covs]
-        self.log_w  = [x.log_w]
-        self.logL_D = logL_D
-        
-        log_norm = logsumexp_jit(logL_D, b = b_ones)
-        
-        self.mu    = np.average(mu_MC, weights = np.exp(logL_D - log_norm), axis = 0)
-        self.sigma = np.average(sigma_MC, weights = np.exp(logL_D - log_norm), axis = 0)
-        if dim == 1:
-            self.mu = np.atleast_2d(self.mu).T
-            self.sigma = np.atleast_2d(self.sigma).T
-            
+    def update_cov_cache(self):
+        """
+        Store the Cholesky factor of the component covariance. To be called every time sigma changes.
+        """
+        self._L = np.linalg.cholesky(self.sigma)
+
 class mixture:
     """
     Class to store a single draw from DPGMM/(H)DPGMM.
@@ -279,7 +563,6 @@ class mixture:
         self.means  = means
         self.covs   = covs
         self.w      = w
-        self.log_w  = np.log(w)
         self.bounds = bounds
         self.dim    = dim
         self.n_cl   = n_cl
@@ -315,7 +598,7 @@ class mixture:
         Returns:
             :np.ndarray: mixture.pdf(x)
         """
-        return self._pdf_probit(x) * np.exp(-probit_logJ(x, self.bounds))
+        return self._pdf_probit(x) * np.exp(-probit_logJ(x, self.bounds, self._probit_logJ_const()))
 
     @probit
     def _logpdf(self, x):
@@ -328,8 +611,79 @@ class mixture:
         Returns:
             :np.ndarray: mixture.logpdf(x)
         """
-        return self._logpdf_probit(x) - probit_logJ(x, self.bounds)
+        return self._logpdf_probit(x) - probit_logJ(x, self.bounds, self._probit_logJ_const())
         
+    def _log_norm_components(self, x):
+        """
+        Evaluate the log pdf of each component at point(s) x in probit space
+        
+        Arguments:
+            :np.ndarray x: point(s) to evaluate the components at (in probit space)
+        
+        Returns:
+            :np.ndarray: (n_cl,len(x)) log pdfs. This is a buffer reused by the next call: it must not be stored, and it can be overwritten
+        """
+        # Hierarchical 1D mixtures store means as (n_cl,1,1)
+        means = np.reshape(self.means, (-1, self.dim))
+        # getattr: mixtures saved with older versions do not have the attribute
+        if getattr(self, '_logpdf_buf', None) is None or self._logpdf_buf.shape != (len(means), len(x)):
+            self._logpdf_buf = np.empty((len(means), len(x)))
+        log_norm_components_chol_out(x, means, self._cholesky(), self._logpdf_buf)
+        return self._logpdf_buf
+
+    def __getstate__(self):
+        # The evaluation buffer is not part of the mixture
+        state = self.__dict__.copy()
+        state.pop('_logpdf_buf', None)
+        return state
+
+    def _cholesky(self):
+        """
+        Cholesky factors of the component covariances, computed on first use and then stored (the mixture parameters are not meant to change)
+        
+        Returns:
+            :np.ndarray: (n_cl,dim,dim) Cholesky factors
+        """
+        # getattr: mixtures saved with older versions do not have the attribute
+        if getattr(self, '_L', None) is None:
+            self._L = cholesky_batch_jit(np.reshape(self.covs, (-1, self.dim, self.dim)))
+        return self._L
+
+    @property
+    def log_w(self):
+        """
+        Log weights of the components, computed on first use and then stored
+        """
+        # getattr: mixtures saved with older versions do not have the attribute
+        if getattr(self, '_log_w', None) is None:
+            self._log_w = np.log(self.w)
+        return self._log_w
+
+    def _probit_logJ_const(self):
+        """
+        Bounds-dependent term of the log Jacobian of the probit transformation, computed on first use and then stored
+        
+        Returns:
+            :double: probit_logJ_const(bounds)
+        """
+        # getattr: mixtures saved with older versions do not have the attribute
+        if getattr(self, '_logJ_const', None) is None:
+            self._logJ_const = probit_logJ_const(self.bounds)
+        return self._logJ_const
+
+    def _cumulative_weights(self):
+        """
+        Cumulative sum of the component weights, computed on first use and then stored. Used to draw component indices.
+        
+        Returns:
+            :np.ndarray: (n_cl,) cumulative weights
+        """
+        # getattr: mixtures saved with older versions do not have the attribute
+        if getattr(self, '_w_cumsum', None) is None:
+            self._w_cumsum     = np.cumsum(self.w)
+            self._w_cumsum[-1] = 1.
+        return self._w_cumsum
+
     def _pdf_probit(self, x):
         """
         Evaluate mixture at point(s) x in probit space
@@ -340,7 +694,8 @@ class mixture:
         Returns:
             :np.ndarray: mixture.pdf(x)
         """
-        return np.sum(np.array([w*mn(mean, cov).pdf(x) for mean, cov, w in zip(self.means, self.covs, self.w)]), axis = 0)
+        log_p = self._log_norm_components(x)
+        return self.w @ np.exp(log_p, out = log_p)
 
     def _logpdf_probit(self, x):
         """
@@ -352,7 +707,7 @@ class mixture:
         Returns:
             :np.ndarray: mixture.logpdf(x)
         """
-        return logsumexp(np.array([w + mn(mean, cov).logpdf(x) for mean, cov, w in zip(self.means, self.covs, self.log_w)]), axis = 0)
+        return logsumexp_cols_jit(self._log_norm_components(x), self.w)
 
     def cdf(self, x):
         if self.dim > 1:
@@ -379,7 +734,7 @@ class mixture:
         Returns:
             :np.ndarray: mixture.cdf(x)
         """
-        return np.sum(np.array([w*norm(mean[0], cov[0,0]).cdf(x) for mean, cov, w in zip(self.means, np.sqrt(self.covs), self.w)]), axis = 0)
+        return (self.w @ ndtr(self._cdf_z(x)))[:,None]
 
     @probit
     def _logcdf(self, x):
@@ -392,7 +747,21 @@ class mixture:
         Returns:
             :np.ndarray: mixture.logcdf(x)
         """
-        return logsumexp(np.array([w + norm(mean[0], cov[0,0]).logcdf(x) for mean, cov, w in zip(self.means, np.sqrt(self.covs), self.log_w)]), axis = 0)
+        return logsumexp_cols_jit(log_ndtr(self._cdf_z(x)), self.w)[:,None]
+    
+    def _cdf_z(self, x):
+        """
+        Standardised distance of point(s) x from each component mean (1D mixtures only)
+        
+        Arguments:
+            :np.ndarray x: point(s) in probit space
+        
+        Returns:
+            :np.ndarray: (n_cl,len(x)) (x - mean)/std for each component
+        """
+        means = np.reshape(self.means, (-1, 1))
+        stds  = np.sqrt(np.reshape(self.covs, (-1, 1)))
+        return (x[:,0] - means)/stds
 
     @from_probit
     def rvs(self, n_samps):
@@ -417,17 +786,9 @@ class mixture:
         Returns:
             :np.ndarray: samples in probit space
         """
-        idx = np.random.choice(np.arange(self.n_cl), p = self.w, size = n_samps)
-        ctr = Counter(idx)
-        if self.dim > 1:
-            samples = np.empty(shape = (1,self.dim))
-            for i, n in zip(ctr.keys(), ctr.values()):
-                samples = np.concatenate((samples, np.atleast_2d(mn(self.means[i], self.covs[i]).rvs(size = n))))
-        else:
-            samples = np.array([np.zeros(1)])
-            for i, n in zip(ctr.keys(), ctr.values()):
-                samples = np.concatenate((samples, np.atleast_2d(mn(self.means[i], self.covs[i]).rvs(size = n)).T))
-        return np.array(samples[1:])
+        idx   = np.searchsorted(self._cumulative_weights(), np.random.random(n_samps))
+        means = np.reshape(self.means, (-1, self.dim))
+        return _draw_components(means, self._cholesky(), idx)
     
     def gradient_pdf(self, x):
         if len(np.shape(x)) < 2:
@@ -436,16 +797,25 @@ class mixture:
     
     @probit
     def _gradient_pdf(self, x):
-        J = np.exp(-probit_logJ(x, self.bounds))[:, None]
-        return self._gradient_pdf_probit(x)*J + self._pdf(x)[:,None]*J*(-x)
+        # x is already in probit space: _pdf_probit, not _pdf, to avoid transforming it twice
+        J = np.exp(-probit_logJ(x, self.bounds, self._probit_logJ_const()))[:, None]
+        return (self._gradient_pdf_probit(x) - self._pdf_probit(x)[:,None]*x)*J
     
     def _gradient_pdf_probit(self, x):
-        return np.sum(np.array([-2*w*mn(mean, cov).pdf(x)[:,None]*np.array([np.dot(inv_jit(cov),(xi-mean).T) for xi in x]) for mean, cov, w in zip(self.means, self.covs, self.w)]), axis = 0)
+        means = np.reshape(self.means, (-1, self.dim))
+        log_p = self._log_norm_components(x)
+        pdfs  = np.exp(log_p, out = log_p)
+        return -2*np.einsum('k,kn,knd->nd', self.w, pdfs, _precision_deviations(x, means, self._cholesky()))
 
     def gradient_logpdf(self, x):
         if len(np.shape(x)) < 2:
             x = np.atleast_2d(x).T
-        return self._gradient_pdf(x)/self._pdf(x)[:,None]
+        return self._gradient_logpdf(x)
+
+    @probit
+    def _gradient_logpdf(self, x):
+        # The Jacobian cancels out in gradient_pdf/pdf
+        return self._gradient_pdf_probit(x)/self._pdf_probit(x)[:,None] - x
 
 #-------------------#
 # Inference classes #
@@ -460,29 +830,42 @@ class DPGMM:
         :iterable prior_pars:    NIW prior parameters (k, L, nu, mu)
         :double alpha0:          initial guess for concentration parameter
         :str or Path out_folder: folder for outputs
+        :int seed:               seed for the random number generator used in cluster assignment. If None, it is drawn from numpy's global state (so np.random.seed still applies)
+        :int alpha_update:       number of samples between two updates of the concentration parameter (1 updates it after every sample)
     
     Returns:
         :DPGMM: instance of DPGMM class
     """
     def __init__(self, bounds,
-                       prior_pars = None,
-                       alpha0     = 1.,
-                       out_folder = '.',
+                       prior_pars   = None,
+                       alpha0       = 1.,
+                       out_folder   = '.',
+                       seed         = None,
+                       alpha_update = 1,
                        ):
         self.bounds   = np.atleast_2d(bounds)
         self.dim      = len(self.bounds)
+        # Bounds-dependent term of probit_logJ
+        self._logJ_const = probit_logJ_const(self.bounds)
         if prior_pars is not None:
             self.prior = prior(*prior_pars)
         else:
             self.prior = prior(1e-2, np.identity(self.dim)*0.2**2, self.dim+2, np.zeros(self.dim))
-        self.alpha      = alpha0
-        self.alpha_0    = alpha0
+        self.alpha        = alpha0
+        self.alpha_0      = alpha0
+        self.alpha_update = int(alpha_update)
         self.mixture    = []
-        self.w          = []
-        self.log_w      = []
+        self._w         = None
+        self._log_w     = None
+        self._w_cumsum  = None
         self.N_list     = []
         self.n_cl       = 0
         self.n_pts      = 0
+        self._init_stacks()
+        self._init_new_t_pars()
+        if seed is None:
+            seed = np.random.randint(2**32, dtype = np.uint64)
+        self.rng        = np.random.default_rng(seed)
 
     def __call__(self, x):
         return self.pdf(x)
@@ -494,15 +877,120 @@ class DPGMM:
         Arguments:
             :iterable prior_pars: NIW prior parameters (k, L, nu, mu). If None, old parameters are kept
         """
-        self.alpha    = self.alpha_0
-        self.mixture  = []
-        self.w        = []
-        self.log_w    = []
-        self.N_list   = []
-        self.n_cl     = 0
-        self.n_pts    = 0
+        self.alpha     = self.alpha_0
+        self.mixture   = []
+        self._w        = None
+        self._log_w    = None
+        self._w_cumsum = None
+        self.N_list    = []
+        self.n_cl      = 0
+        self.n_pts     = 0
+        self._init_stacks()
         if prior_pars is not None:
             self.prior = prior(*prior_pars)
+        self._init_new_t_pars()
+    
+    @property
+    def w(self):
+        """
+        Weights of the components, computed on first use after a sample is assigned (each sample adds one to n_pts and to the number of samples of a single component)
+        """
+        if self._w is None:
+            self._w = self._N_stack[:self.n_cl]/self.n_pts
+        return self._w
+    
+    @property
+    def log_w(self):
+        """
+        Log weights of the components, computed on first use after the weights change
+        """
+        if self._log_w is None:
+            self._log_w = np.log(self.w)
+        return self._log_w
+    
+    def _cumulative_weights(self):
+        """
+        Cumulative sum of the component weights, computed on first use after the weights change. Used to draw component indices.
+        
+        Returns:
+            :np.ndarray: (n_cl,) cumulative weights
+        """
+        if self._w_cumsum is None:
+            self._w_cumsum     = np.cumsum(self.w)
+            self._w_cumsum[-1] = 1.
+        return self._w_cumsum
+    
+    def _init_stacks(self, size = 16):
+        """
+        Allocate the stacked component parameters (mean, covariance and its Cholesky factor), sufficient statistics (samples mean, covariance and number) and student-t predictive parameters.
+        These arrays are used for every evaluation of the mixture and for cluster assignment.
+        
+        Arguments:
+            :int size: initial number of components that can be stored
+        """
+        self._mu_stack    = np.zeros((size, self.dim))
+        self._sigma_stack = np.zeros((size, self.dim, self.dim))
+        self._L_stack     = np.zeros((size, self.dim, self.dim))
+        self._means_stack = np.zeros((size, self.dim))
+        self._S_stack     = np.zeros((size, self.dim, self.dim))
+        self._N_stack     = np.zeros(size)
+        self._t_mu_stack  = np.zeros((size, self.dim))
+        self._t_L_stack   = np.zeros((size, self.dim, self.dim))
+        self._t_df_stack  = np.zeros(size)
+        self._t_c_stack   = np.zeros(size)
+        self._log_N_stack = np.zeros(size)
+    
+    def _grow_stacks(self):
+        """
+        Double the size of the stacked arrays if they are full.
+        """
+        size = len(self._N_stack)
+        if self.n_cl < size:
+            return
+        self._mu_stack    = np.concatenate((self._mu_stack, np.zeros((size, self.dim))))
+        self._sigma_stack = np.concatenate((self._sigma_stack, np.zeros((size, self.dim, self.dim))))
+        self._L_stack     = np.concatenate((self._L_stack, np.zeros((size, self.dim, self.dim))))
+        self._means_stack = np.concatenate((self._means_stack, np.zeros((size, self.dim))))
+        self._S_stack     = np.concatenate((self._S_stack, np.zeros((size, self.dim, self.dim))))
+        self._N_stack     = np.concatenate((self._N_stack, np.zeros(size)))
+        self._t_mu_stack  = np.concatenate((self._t_mu_stack, np.zeros((size, self.dim))))
+        self._t_L_stack   = np.concatenate((self._t_L_stack, np.zeros((size, self.dim, self.dim))))
+        self._t_df_stack  = np.concatenate((self._t_df_stack, np.zeros(size)))
+        self._t_c_stack   = np.concatenate((self._t_c_stack, np.zeros(size)))
+        self._log_N_stack = np.concatenate((self._log_N_stack, np.zeros(size)))
+    
+    def _init_new_t_pars(self):
+        """
+        Compute the student-t predictive parameters for a new component, which depend on the prior only.
+        """
+        self._new_t_pars = _student_t_chol_pars(self.prior.k, self.prior.mu, self.prior.nu, self.prior.L, np.zeros((1, self.dim)), np.zeros((self.dim, self.dim)), 0., self.dim)
+    
+    def _update_t_pars(self, cid):
+        """
+        Update the student-t predictive parameters of a component in the stacked arrays (including the Cholesky factor of the scale matrix) and the log number of samples.
+        
+        Arguments:
+            :int cid: component index
+        """
+        t_df, t_mu, t_L, log_c = _student_t_chol_pars(self.prior.k, self.prior.mu, self.prior.nu, self.prior.L, self._means_stack[cid:cid+1], self._S_stack[cid], self._N_stack[cid], self.dim)
+        self._t_df_stack[cid]  = t_df
+        self._t_mu_stack[cid]  = t_mu
+        self._t_L_stack[cid]   = t_L
+        self._t_c_stack[cid]   = log_c
+        self._log_N_stack[cid] = np.log(self._N_stack[cid])
+    
+    def _store_component(self, cid, ss):
+        """
+        Copy the parameters of a component into the stacked arrays.
+        
+        Arguments:
+            :int cid:      component index
+            :component ss: component
+        """
+        self._mu_stack[cid]    = np.reshape(ss.mu, self.dim)
+        self._sigma_stack[cid] = np.reshape(ss.sigma, (self.dim, self.dim))
+        self._L_stack[cid]     = np.reshape(ss._L, (self.dim, self.dim))
+        self._N_stack[cid]     = ss.N
         
     def _add_datapoint_to_component(self, x, ss):
         """
@@ -515,30 +1003,28 @@ class DPGMM:
         Returns:
             :component: updated component
         """
-        new_mean, new_S, new_N, new_mu, new_sigma = compute_component_suffstats(x, ss.mean, ss.S, ss.N, self.prior.mu, self.prior.k, self.prior.nu, self.prior.L)
-        ss.mean  = new_mean
-        ss.S     = new_S
-        ss.N     = new_N
-        ss.mu    = new_mu
-        ss.sigma = new_sigma
+        # Also updates the Cholesky factor ss._L
+        ss.N = update_component_suffstats(x, ss.mean, ss.S, ss.N, ss.mu, ss.sigma, ss._L, self.prior.mu, self.prior.k, self.prior.nu, self.prior.L)
         return ss
     
-    def _log_predictive_likelihood(self, x, ss):
+    def _log_predictive_likelihood(self, x, cid):
         """
-        Compute log likelihood of drawing sample x from component ss given the samples that are already assigned to that component.
+        Compute log likelihood of drawing sample x from component cid given the samples that are already assigned to that component.
         
         Arguments:
             :np.ndarray x: sample
-            :component ss: component to update
+            :int cid:      component index (-1 for a new component)
         
         Returns:
             :double: log Likelihood
         """
-        if ss == "new":
-            ss = component(np.zeros(self.dim), prior = self.prior)
-            ss.N = 0.
-        t_df, t_shape, mu_n = compute_t_pars(self.prior.k, self.prior.mu, self.prior.nu, self.prior.L, ss.mean, ss.S, ss.N, self.dim)
-        return _student_t(df = t_df, t = x, mu = mu_n, sigma = t_shape, dim = self.dim)
+        if cid < 0:
+            t_df, t_mu, t_L, log_c = self._new_t_pars
+        else:
+            t_df, t_mu, t_L, log_c = self._t_df_stack[cid], self._t_mu_stack[cid], self._t_L_stack[cid], self._t_c_stack[cid]
+        if self.dim == 1:
+            return _student_t_1d(t_df, np.ravel(x)[0], t_mu[0], t_L[0,0]**2)
+        return _student_t_chol(np.ravel(x), t_mu, t_L, t_df, log_c, self.dim)
 
     def _cluster_assignment_distribution(self, x):
         """
@@ -548,23 +1034,14 @@ class DPGMM:
             :np.ndarray x: sample
         
         Returns:
-            :dict: p_i for each component
-        """
-        scores = {}
-        for i in list(np.arange(self.n_cl)) + ["new"]:
-            if i == "new":
-                ss = "new"
-            else:
-                ss = self.mixture[i]
-            scores[i] = self._log_predictive_likelihood(x, ss)
-            if ss == "new":
-                scores[i] += np.log(self.alpha)
-            else:
-                scores[i] += np.log(ss.N)
-        scores = {cid: (np.exp(score) if score < np.inf else 0) for cid, score in scores.items()} # score < inf checks also for NaNs
-        normalization = 1/sum(scores.values())
-        scores = {cid: score*normalization for cid, score in scores.items()}
-        return scores
+            :np.ndarray: p_i for each component (the last one is for a new component)
+        """
+        n_cl   = self.n_cl
+        # Student-t parameters are cached per component: no factorisation is needed here
+        scores = _log_predictive_likelihood_batch(x[0], self._t_mu_stack, self._t_L_stack, self._t_df_stack, self._t_c_stack, n_cl, self._new_t_pars, self.dim)
+        scores[:n_cl] += self._log_N_stack[:n_cl]
+        scores[n_cl]  += np.log(self.alpha)
+        return _normalise_log_scores(scores)
 
     def _assign_to_cluster(self, x):
         """
@@ -573,20 +1050,30 @@ class DPGMM:
         Arguments:
             :np.ndarray x: sample
         """
-        scores = self._cluster_assignment_distribution(x).items()
-        labels, scores = zip(*scores)
-        cid = np.random.choice(labels, p=scores)
-        if cid == "new":
-            self.mixture.append(component(x, prior = self.prior))
+        scores = self._cluster_assignment_distribution(x)
+        if not np.all(np.isfinite(scores)):
+            raise FIGAROException("You probably have a sample that falls outside the given boundaries")
+        cum = np.cumsum(scores)
+        cid = np.searchsorted(cum, self.rng.random()*cum[-1])
+        cid = min(cid, self.n_cl)
+        if cid == self.n_cl:
+            ss = component(x, prior = self.prior)
+            self.mixture.append(ss)
             self.N_list.append(1.)
             self.n_cl += 1
+            self._grow_stacks()
         else:
-            self.mixture[int(cid)] = self._add_datapoint_to_component(x, self.mixture[int(cid)])
-            self.N_list[int(cid)] += 1
-        # Update weights
-        self.w = np.array(self.N_list)
-        self.w = self.w/self.w.sum()
-        self.log_w = np.log(self.w)
+            ss = self._add_datapoint_to_component(x, self.mixture[cid])
+            self.mixture[cid] = ss
+            self.N_list[cid] += 1
+        self._store_component(cid, ss)
+        self._means_stack[cid] = ss.mean[0]
+        self._S_stack[cid]     = ss.S
+        self._update_t_pars(cid)
+        # Weights, log_w and the cumulative weights are recomputed only when needed
+        self._w        = None
+        self._log_w    = None
+        self._w_cumsum = None
         return
     
     def density_from_samples(self, samples):
@@ -599,9 +1086,11 @@ class DPGMM:
         Returns:
             :mixture: the inferred mixture
         """
-        np.random.shuffle(samples)
-        for s in samples:
-            self.add_new_point(s)
+        # Samples are transformed to probit space all at once rather than one by one in add_new_point
+        samples_p = transform_to_probit(np.asarray(samples), self.bounds)
+        np.random.shuffle(samples_p)
+        for s in samples_p:
+            self._add_new_point_probit(s)
         d = self.build_mixture()
         self.initialise()
         return d
@@ -614,9 +1103,19 @@ class DPGMM:
         Arguments:
             :np.ndarray x: sample
         """
+        self._add_new_point_probit(x)
+    
+    def _add_new_point_probit(self, x):
+        """
+        Update the probability density reconstruction adding a new sample in probit space
+        
+        Arguments:
+            :np.ndarray x: sample (in probit space)
+        """
         self.n_pts += 1
         self._assign_to_cluster(np.atleast_2d(x))
-        self.alpha = update_alpha(self.alpha, self.n_pts, self.n_cl)
+        if self.n_pts % self.alpha_update == 0:
+            self.alpha = update_alpha(self.alpha, self.n_pts, self.n_cl)
     
     @from_probit
     def rvs(self, n_samps):
@@ -643,17 +1142,8 @@ class DPGMM:
         Returns:
             :np.ndarray: samples in probit space
         """
-        idx = np.random.choice(np.arange(self.n_cl), p = self.w, size = n_samps)
-        ctr = Counter(idx)
-        if self.dim > 1:
-            samples = np.empty(shape = (1,self.dim))
-            for i, n in zip(ctr.keys(), ctr.values()):
-                samples = np.concatenate((samples, np.atleast_2d(mn(self.mixture[i].mu, self.mixture[i].sigma).rvs(size = n))))
-        else:
-            samples = np.array([np.zeros(1)])
-            for i, n in zip(ctr.keys(), ctr.values()):
-                samples = np.concatenate((samples, np.atleast_2d(mn(self.mixture[i].mu, self.mixture[i].sigma).rvs(size = n)).T))
-        return samples[1:]
+        idx = np.searchsorted(self._cumulative_weights(), np.random.random(n_samps))
+        return _draw_components(self._mu_stack, self._L_stack, idx)
 
     def _pdf_probit(self, x):
         """
@@ -665,7 +1155,13 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.pdf(x)
         """
-        return np.sum(np.array([w*mn(comp.mu, comp.sigma).pdf(x) for comp, w in zip(self.mixture, self.w)]), axis = 0)
+        if self.dim == 1:
+            # The Cholesky factor of a 1D covariance is the standard deviation
+            means = self._mu_stack[:self.n_cl,0]
+            stds  = self._L_stack[:self.n_cl,0,0]
+            z     = (x[:,0] - means[:,None])/stds[:,None]
+            return (self.w/(stds*np.sqrt(2*np.pi))) @ np.exp(-0.5*z**2)
+        return self.w @ np.exp(log_norm_components_chol(x, self._mu_stack[:self.n_cl], self._L_stack[:self.n_cl]))
 
     @probit
     def _pdf_no_jacobian(self, x):
@@ -701,7 +1197,7 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.pdf(x)
         """
-        return self._pdf_probit(x) * np.exp(-probit_logJ(x, self.bounds))
+        return self._pdf_probit(x) * np.exp(-probit_logJ(x, self.bounds, self._logJ_const))
 
     def _logpdf_probit(self, x):
         """
@@ -713,7 +1209,7 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.logpdf(x)
         """
-        return logsumexp(np.array([w + mn(comp.mu, comp.sigma).logpdf(x) for comp, w in zip(self.mixture, self.log_w)]), axis = 0)
+        return logsumexp_cols_jit(log_norm_components_chol(x, self._mu_stack[:self.n_cl], self._L_stack[:self.n_cl]), self.w)
 
     @probit
     def _logpdf_no_jacobian(self, x):
@@ -749,7 +1245,7 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.logpdf(x)
         """
-        return self._logpdf_probit(x) - probit_logJ(x, self.bounds)
+        return self._logpdf_probit(x) - probit_logJ(x, self.bounds, self._logJ_const)
 
     def gradient_pdf(self, x):
         """
@@ -778,8 +1274,9 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.gradient_pdf(x)
         """
-        J = np.exp(-probit_logJ(x, self.bounds))
-        return self._gradient_pdf_probit(x)*J + self._pdf(x)*J*(-x)
+        # x is already in probit space: _pdf_probit, not _pdf, to avoid transforming it twice
+        J = np.exp(-probit_logJ(x, self.bounds, self._logJ_const))[:, None]
+        return (self._gradient_pdf_probit(x) - self._pdf_probit(x)[:,None]*x)*J
     
     def _gradient_pdf_probit(self, x):
         """
@@ -791,7 +1288,10 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.gradient_pdf(x)
         """
-        return np.sum(np.array([-w*mn(comp.mean, comp.cov).pdf(x).reshape(-1,self.dim)*np.einsum("ij,ij->i",inv_jit(comp.cov),(x-comp.mean)).reshape(-1,len(x)) for comp, w in zip(self.mixture, self.w)]), axis = 0)
+        means = self._mu_stack[:self.n_cl]
+        L     = self._L_stack[:self.n_cl]
+        pdfs  = np.exp(log_norm_components_chol(x, means, L))
+        return -np.einsum('k,kn,knd->nd', self.w, pdfs, _precision_deviations(x, means, L))
 
     def gradient_logpdf(self, x):
         """
@@ -832,7 +1332,7 @@ class DPGMM:
         Returns:
             :np.ndarray: mixture.gradient_logpdf(x)
         """
-        return np.sum(np.array([-w*np.einsum("ij,ij->i",inv_jit(comp.cov),(x-comp.mean)).reshape(-1,self.dim) for comp, w in zip(self.mixture, self.w)]), axis = 0)
+        return -np.einsum('k,knd->nd', self.w, _precision_deviations(x, self._mu_stack[:self.n_cl], self._L_stack[:self.n_cl]))
 
     def build_mixture(self):
         """
@@ -843,7 +1343,7 @@ class DPGMM:
         """
         if self.n_cl == 0:
             raise FIGAROException("You are trying to build an empty mixture - perhaps you called the initialise() method. If you are using the density_from_samples() method, the inferred mixture is returned from that method as an instance of mixture class.")
-        return mixture(np.array([comp.mu for comp in self.mixture]), np.array([comp.sigma for comp in self.mixture]), np.array(self.w), self.bounds, self.dim, self.n_cl, self.n_pts)
+        return mixture(self._mu_stack[:self.n_cl].copy(), self._sigma_stack[:self.n_cl].copy(), np.array(self.w), self.bounds, self.dim, self.n_cl, self.n_pts)
 
 class HDPGMM(DPGMM):
     """
@@ -855,40 +1355,79 @@ class HDPGMM(DPGMM):
         :iterable prior_pars:    NIW prior parameters (k, L, nu, mu)
         :double alpha0:          initial guess for concentration parameter
         :str or Path out_folder: folder for outputs
+        :int seed:               seed for the random number generator used in cluster assignment. If None, it is drawn from numpy's global state (so np.random.seed still applies)
+        :int alpha_update:       number of draws between two updates of the concentration parameter (1 updates it after every draw)
+        :np.dtype dtype:         precision of the MC draws and of the stored log likelihoods (np.float32 halves memory traffic at the price of the MC estimate precision). Component parameters are always double precision
     
     Returns:
         :HDPGMM: instance of HDPGMM class
     """
     def __init__(self, bounds,
-                       alpha0     = 1.,
-                       out_folder = '.',
-                       prior_pars = None,
-                       MC_draws   = 2e3,
+                       alpha0       = 1.,
+                       out_folder   = '.',
+                       prior_pars   = None,
+                       MC_draws     = 2e3,
+                       seed         = None,
+                       dtype        = np.float64,
+                       alpha_update = 1,
                        ):
         bounds   = np.atleast_2d(bounds)
         self.dim = len(bounds)
         if prior_pars == None:
             prior_pars = (1e-2, np.identity(self.dim)*0.2**2, self.dim+2, np.zeros(self.dim))
-        super().__init__(bounds = bounds, prior_pars = prior_pars, alpha0 = alpha0, out_folder = out_folder)
+        # Needed by _init_stacks, called in DPGMM.__init__
         self.MC_draws = int(MC_draws)
-        
-        df = np.max([self.prior.nu, self.dim + 2])
-        self.sigma_MC = invwishart(df = df, scale = self.prior.L).rvs(size = self.MC_draws)
+        self.dtype    = np.dtype(dtype)
+        super().__init__(bounds = bounds, prior_pars = prior_pars, alpha0 = alpha0, out_folder = out_folder, seed = seed, alpha_update = alpha_update)
+        # MC draws are redrawn in place, once per reconstruction
+        self._sigma_MC_buf = np.empty((self.MC_draws, self.dim, self.dim), dtype = self.dtype)
+        self._mu_MC_buf    = np.empty((self.MC_draws, self.dim), dtype = self.dtype)
         if self.dim == 1:
-            self.mu_MC    = np.array([np.random.normal(loc = self.prior.mu[0], scale = s) for s in np.sqrt(self.sigma_MC/self.prior.k)])
+            # Flat views, as expected by evaluate_mixture_MC_draws_1d
+            self.sigma_MC = self._sigma_MC_buf.reshape(-1)
+            self.mu_MC    = self._mu_MC_buf.reshape(-1)
         else:
-            self.mu_MC    = np.array([mn(self.prior.mu, s/self.prior.k).rvs() for s in self.sigma_MC])
-        # For logsumexp_jit
-        self.b_ones = np.ones(self.MC_draws)
+            self.sigma_MC = self._sigma_MC_buf
+            self.mu_MC    = self._mu_MC_buf
+        self._MC_drawn = False
         
     def initialise(self, prior_pars = None):
         super().initialise(prior_pars = prior_pars)
+        # The MC draws are drawn with the first event of the next reconstruction (not here, as density_from_samples calls initialise after each draw)
+        self._MC_drawn = False
+    
+    def _init_stacks(self, size = 16):
+        """
+        Allocate the stacked component parameters, including the log likelihood of the events in each component for each MC draw and its normalisation.
+        
+        Arguments:
+            :int size: initial number of components that can be stored
+        """
+        super()._init_stacks(size = size)
+        self._logL_D_stack     = np.zeros((size, self.MC_draws), dtype = self.dtype)
+        self._log_norm_D_stack = np.zeros(size)
+    
+    def _grow_stacks(self):
+        """
+        Double the size of the stacked arrays if they are full.
+        """
+        size = len(self._N_stack)
+        if self.n_cl >= size:
+            self._logL_D_stack     = np.concatenate((self._logL_D_stack, np.zeros((size, self.MC_draws), dtype = self.dtype)))
+            self._log_norm_D_stack = np.concatenate((self._log_norm_D_stack, np.zeros(size)))
+        super()._grow_stacks()
+    
+    def _draw_MC_pars(self):
+        """
+        Draw the MC samples for mean and covariance of the components from the NIW prior, all at once.
+        """
         df = np.max([self.prior.nu, self.dim + 2])
-        self.sigma_MC = invwishart(df = df, scale = self.prior.L).rvs(size = self.MC_draws)
-        if self.dim == 1:
-            self.mu_MC    = np.array([np.random.normal(loc = self.prior.mu[0], scale = s) for s in np.sqrt(self.sigma_MC/self.prior.k)])
-        else:
-            self.mu_MC    = np.array([mn(self.prior.mu, s/self.prior.k).rvs() for s in self.sigma_MC])
+        sample_invwishart(df, self.prior.L, self.MC_draws, out = self._sigma_MC_buf)
+        z = np.random.standard_normal((self.MC_draws, self.dim))
+        np.einsum('bij,bj->bi', np.linalg.cholesky(self._sigma_MC_buf), z, out = self._mu_MC_buf, casting = 'same_kind')
+        self._mu_MC_buf *= 1./np.sqrt(self.prior.k)
+        self._mu_MC_buf += self.prior.mu
+        self._MC_drawn = True
     
     def add_new_point(self, ev):
         """
@@ -897,10 +1436,21 @@ class HDPGMM(DPGMM):
         Arguments:
             :iterable x: set of single-event draws from a DPGMM inference
         """
+        self._add_new_draw(ev[self.rng.integers(len(ev))])
+    
+    def _add_new_draw(self, x):
+        """
+        Update the probability density reconstruction adding a single-event draw
+        
+        Arguments:
+            :mixture x: single-event draw from a DPGMM inference
+        """
+        if not self._MC_drawn:
+            self._draw_MC_pars()
         self.n_pts += 1
-        x = np.random.choice(ev)
         self._assign_to_cluster(x)
-        self.alpha = update_alpha(self.alpha, self.n_pts, self.n_cl)
+        if self.n_pts % self.alpha_update == 0:
+            self.alpha = update_alpha(self.alpha, self.n_pts, self.n_cl)
 
     def _cluster_assignment_distribution(self, x):
         """
@@ -910,32 +1460,20 @@ class HDPGMM(DPGMM):
             :np.ndarray x: sample
         
         Returns:
-            :dict: p_i for each component
+            :np.ndarray: p_i for each component (the last one is for a new component)
+            :np.ndarray: (n_cl+1,MC_draws) logL_D + logL_x for each component
+            :np.ndarray: (n_cl+1,) log(sum(exp(logL_D + logL_x))) for each component
         """
-        scores = {}
-        logL_N = {}
-        
+        means, covs = pack_mixture(x.means, x.covs)
         if self.dim == 1:
-            logL_x = evaluate_mixture_MC_draws_1d(self.mu_MC, self.sigma_MC, x.means, x.covs, x.w)
+            logL_x = evaluate_mixture_MC_draws_1d(self.mu_MC, self.sigma_MC, means, covs, x.w)
+        elif self.dim > 3:
+            logL_x = make_evaluate_mixture_MC_draws(self.dim)(self.mu_MC, self.sigma_MC, means, covs, x.w)
         else:
-            logL_x = evaluate_mixture_MC_draws(self.mu_MC, self.sigma_MC, x.means, x.covs, x.w)
-        for i in list(np.arange(self.n_cl)) + ["new"]:
-            if i == "new":
-                ss = "new"
-                logL_D = np.zeros(self.MC_draws)
-            else:
-                ss = self.mixture[i]
-                logL_D = ss.logL_D
-            scores[i] = logsumexp_jit(logL_D + logL_x, b = self.b_ones) - logsumexp_jit(logL_D, b = self.b_ones)
-            logL_N[i] = logL_D + logL_x
-            if ss == "new":
-                scores[i] += np.log(self.alpha)
-            else:
-                scores[i] += np.log(ss.N)
-        scores = {cid: (np.exp(score) if score < np.inf else 0)  for cid, score in scores.items()} # score < inf checks also for NaNs
-        normalization = 1/sum(scores.values())
-        scores = {cid: score*normalization for cid, score in scores.items()}
-        return scores, logL_N
+            logL_x = evaluate_mixture_MC_draws(self.mu_MC, self.sigma_MC, means, covs, x.w)
+        n_cl = self.n_cl
+        scores, logL_N, log_norm_N = _log_assignment_scores_h(self._logL_D_stack[:n_cl], logL_x, self._log_norm_D_stack[:n_cl], self._log_N_stack[:n_cl], np.log(self.alpha))
+        return _normalise_log_scores(scores), logL_N, log_norm_N
 
     def _assign_to_cluster(self, x):
         """
@@ -944,54 +1482,47 @@ class HDPGMM(DPGMM):
         Arguments:
             :np.ndarray x: sample
         """
-        scores, logL_N = self._cluster_assignment_distribution(x)
-        scores = scores.items()
-        labels, scores = zip(*scores)
-        try:
-            cid = np.random.choice(labels, p=scores)
-        except ValueError:
-            cid = "new"
-        if cid == "new":
-            self.mixture.append(component_h(x, self.dim, self.prior, logL_N[cid], self.mu_MC, self.sigma_MC, self.b_ones))
+        scores, logL_N, log_norm_N = self._cluster_assignment_distribution(x)
+        if np.all(np.isfinite(scores)):
+            cum = np.cumsum(scores)
+            cid = np.searchsorted(cum, self.rng.random()*cum[-1])
+            cid = min(cid, self.n_cl)
+        else:
+            cid = self.n_cl
+        # Components are stored only in the stacked arrays: self.mixture keeps the events assigned to each component
+        if cid == self.n_cl:
+            self.mixture.append([x])
             self.N_list.append(1.)
             self.n_cl += 1
+            self._grow_stacks()
         else:
-            self.mixture[int(cid)] = self._add_datapoint_to_component(x, self.mixture[int(cid)], logL_N[int(cid)])
-            self.N_list[int(cid)] += 1
-        # Update weights
-        self.w = np.array(self.N_list)
-        self.w = self.w/self.w.sum()
-        self.log_w = np.log(self.w)
+            self.mixture[cid].append(x)
+            self.N_list[cid] += 1
+        self._update_component(cid, logL_N[cid], log_norm_N[cid])
+        # Weights, log_w and the cumulative weights are recomputed only when needed
+        self._w        = None
+        self._log_w    = None
+        self._w_cumsum = None
         return
 
-    def _add_datapoint_to_component(self, x, ss, logL_D):
+    def _update_component(self, cid, logL_D, log_norm_D):
         """
-        Update component parameters after assigning a sample to a component
+        Update the stacked parameters of a component after assigning an event to it
         
         Arguments:
-            :np.ndarray x: sample
-            :component ss: component to update
-            :double logL_D: log Likelihood denominator
-        
-        Returns:
-            :component: updated component
-        """
-        ss.events.append(x)
-        ss.means.append(x.means)
-        ss.covs.append(x.covs)
-        ss.log_w.append(x.log_w)
-        ss.logL_D = logL_D
-
-        log_norm = logsumexp_jit(logL_D, self.b_ones)
-
-        ss.mu    = np.average(self.mu_MC, weights = np.exp(logL_D - log_norm), axis = 0)
-        ss.sigma = np.average(self.sigma_MC, weights = np.exp(logL_D - log_norm), axis = 0)
-        if self.dim == 1:
-            ss.mu = np.atleast_2d(ss.mu).T
-            ss.sigma = np.atleast_2d(ss.sigma).T
-        
-        ss.N += 1
-        return ss
+            :int cid:           component index
+            :np.ndarray logL_D: (MC_draws,) log likelihood of the events in the component for each MC draw
+            :double log_norm_D: log(sum(exp(logL_D)))
+        """
+        # The (MC_draws,dim) and (MC_draws,dim,dim) buffers are used also in 1D, so no reshaping is needed
+        mu, sigma = _average_MC_draws(logL_D, log_norm_D, self._mu_MC_buf, self._sigma_MC_buf)
+        self._mu_stack[cid]         = mu
+        self._sigma_stack[cid]      = sigma
+        self._L_stack[cid]          = np.linalg.cholesky(sigma)
+        self._N_stack[cid]          = self.N_list[cid]
+        self._log_N_stack[cid]      = np.log(self.N_list[cid])
+        self._logL_D_stack[cid]     = logL_D
+        self._log_norm_D_stack[cid] = log_norm_D
 
     def density_from_samples(self, events):
         """
@@ -1004,8 +1535,10 @@ class HDPGMM(DPGMM):
             :mixture: the inferred mixture
         """
         np.random.shuffle(events)
-        for ev in events:
-            self.add_new_point(ev)
+        # One draw per event, all selected with a single call to the random number generator
+        idx = self.rng.integers([len(ev) for ev in events])
+        for ev, i in zip(events, idx):
+            self._add_new_draw(ev[i])
         d = self.build_mixture()
         self.initialise()
         return d
@@ -2,16 +2,50 @@ import numpy as np
 
 import optparse as op
 import dill
+import pickle
 import importlib
 
 from pathlib import Path
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from contextlib import nullcontext
 
 from figaro.mixture import DPGMM, HDPGMM
 from figaro.transform import transform_to_probit
-from figaro.utils import save_options, plot_median_cr, plot_multidim, get_priors
+from figaro.utils import save_options, plot_median_cr, plot_multidim, get_priors, init_worker, worker_data
 from figaro.load import load_data
 
+def _single_event_draw(args):
+    """
+    Draw a single-event distribution in a worker process.
+    
+    Arguments:
+        :tuple args: index of the event, seed for the random number generators and prior parameters for the event
+    
+    Returns:
+        :mixture: the inferred mixture
+    """
+    i, seed, prior_pars = args
+    np.random.seed(seed)
+    ev  = worker_data['events'][i]
+    mix = DPGMM(worker_data['bounds'], prior_pars = prior_pars, seed = seed)
+    return mix.density_from_samples(ev)
+
+def _hierarchical_draw(seed):
+    """
+    Draw a hierarchical distribution in a worker process.
+    
+    Arguments:
+        :int seed: seed for the random number generators
+    
+    Returns:
+        :mixture: the inferred mixture
+    """
+    np.random.seed(seed)
+    mix = HDPGMM(worker_data['bounds'], prior_pars = worker_data['prior_pars'], MC_draws = worker_data['MC_draws'], seed = seed)
+    return mix.density_from_samples(worker_data['posteriors'])
+
 def main():
 
     parser = op.OptionParser()
@@ -39,6 +73,7 @@ def main():
     parser.add_option("-e", "--events", dest = "run_events", action = 'store_false', help = "Skip single-event analysis", default = True)
     parser.add_option("--sigma_prior", dest = "sigma_prior", type = "string", help = "Expected standard deviation (prior) for hierarchical inference - single value or n-dim values. If None, it is estimated from samples", default = None)
     parser.add_option("--MC_draws", dest = "MC_draws", type = "int", help = "Number of draws for assignment MC integral", default = 2000)
+    parser.add_option("--n_jobs", dest = "n_jobs", type = "int", help = "Number of processes used to compute the draws (each draw is independent)", default = 1)
     (options, args) = parser.parse_args()
 
     # Paths
@@ -106,12 +141,12 @@ def main():
     if options.exclude_points:
         print("Ignoring points outside bounds.")
         for i, ev in enumerate(events):
-            events[i] = ev[np.where((np.prod(options.bounds[:,0] < ev, axis = 1) & np.prod(ev < options.bounds[:,1], axis = 1)))]
+            events[i] = ev[np.all((options.bounds[:,0] < ev) & (ev < options.bounds[:,1]), axis = 1)]
         all_samples = np.atleast_2d(np.concatenate(events))
     else:
         # Check if all samples are within bounds
         all_samples = np.atleast_2d(np.concatenate(events))
-        if not np.alltrue([(all_samples[:,i] > options.bounds[i,0]).all() and (all_samples[:,i] < options.bounds[i,1]).all() for i in range(dim)]):
+        if not np.all((options.bounds[:,0] < all_samples) & (all_samples < options.bounds[:,1])):
             raise ValueError("One or more samples are outside the given bounds.")
 
     # Plot labels
@@ -130,27 +165,36 @@ def main():
         if options.run_events:
             mix = DPGMM(options.bounds)
             posteriors = []
-            # Run each single-event analysis
-            for i in tqdm(range(len(events)), desc = 'Events'):
-                ev   = events[i]
-                name = names[i]
-                mix.initialise(prior_pars = get_priors(mix.bounds, samples = ev))
-                # Draw samples
-                draws = [mix.density_from_samples(ev) for _ in range(options.n_se_draws)]
-                posteriors.append(draws)
-                # Make plots
-                if options.save_single_event:
-                    if dim == 1:
-                        plot_median_cr(draws, samples = ev, out_folder = output_plots, name = name, label = options.symbol, unit = options.unit, subfolder = True)
+            # No worker processes are started for a sequential run. Workers are spawned rather than forked: forking after the parent has run parallel numba kernels (plots) can hang or abort the threading layer
+            executor = ProcessPoolExecutor(max_workers = options.n_jobs, mp_context = get_context('spawn'), initializer = init_worker, initargs = ({'events': events, 'bounds': options.bounds}, options.n_jobs)) if options.n_jobs > 1 else nullcontext()
+            with executor:
+                # Run each single-event analysis
+                for i in tqdm(range(len(events)), desc = 'Events'):
+                    ev   = events[i]
+                    name = names[i]
+                    # The prior depends only on the event samples, so it is shared by all the draws
+                    prior_pars = get_priors(mix.bounds, samples = ev)
+                    # Draw samples
+                    if options.n_jobs > 1:
+                        seeds = np.random.randint(2**32, dtype = np.uint64, size = options.n_se_draws)
+                        draws = list(executor.map(_single_event_draw, [(i, seed, prior_pars) for seed in seeds]))
                     else:
-                        plot_multidim(draws, samples = ev, out_folder = output_plots, name = name, labels = symbols, units = units)
-                # Save single-event draws
-                with open(Path(output_pkl, 'draws_'+name+'.pkl'), 'wb') as f:
-                    dill.dump(np.array(draws), f)
+                        mix.initialise(prior_pars = prior_pars)
+                        draws = [mix.density_from_samples(ev) for _ in range(options.n_se_draws)]
+                    posteriors.append(draws)
+                    # Make plots
+                    if options.save_single_event:
+                        if dim == 1:
+                            plot_median_cr(draws, samples = ev, out_folder = output_plots, name = name, label = options.symbol, unit = options.unit, subfolder = True)
+                        else:
+                            plot_multidim(draws, samples = ev, out_folder = output_plots, name = name, labels = symbols, units = units)
+                    # Save single-event draws
+                    with open(Path(output_pkl, 'draws_'+name+'.pkl'), 'wb') as f:
+                        pickle.dump(np.array(draws), f, protocol = pickle.HIGHEST_PROTOCOL)
             # Save all single-event draws together
             posteriors = np.array(posteriors)
             with open(Path(output_pkl, 'posteriors_single_event.pkl'), 'wb') as f:
-                dill.dump(posteriors, f)
+                pickle.dump(posteriors, f, protocol = pickle.HIGHEST_PROTOCOL)
         else:
             # Load pre-computed posteriors
             try:
@@ -159,11 +203,19 @@ def main():
             except FileNotFoundError:
                 raise FileNotFoundError("No posteriors_single_event.pkl file found. Please provide it or re-run the single-event inference")
         # Run hierarchical analysis
-        mix   = HDPGMM(options.bounds, prior_pars = get_priors(options.bounds, samples = all_samples, std = options.sigma_prior), MC_draws = options.MC_draws)
-        draws = np.array([mix.density_from_samples(posteriors) for _ in tqdm(range(options.n_draws), desc = 'Hierarchical')])
+        prior_pars = get_priors(options.bounds, samples = all_samples, std = options.sigma_prior)
+        if options.n_jobs > 1:
+            seeds = np.random.randint(2**32, dtype = np.uint64, size = options.n_draws)
+            data  = {'posteriors': posteriors, 'bounds': options.bounds, 'prior_pars': prior_pars, 'MC_draws': options.MC_draws}
+            # Posteriors are sent once per worker process rather than once per draw. Spawned workers, as for the single-event pool
+            with ProcessPoolExecutor(max_workers = options.n_jobs, mp_context = get_context('spawn'), initializer = init_worker, initargs = (data, options.n_jobs)) as executor:
+                draws = np.array(list(tqdm(executor.map(_hierarchical_draw, seeds), total = options.n_draws, desc = 'Hierarchical')))
+        else:
+            mix   = HDPGMM(options.bounds, prior_pars = prior_pars, MC_draws = options.MC_draws)
+            draws = np.array([mix.density_from_samples(posteriors) for _ in tqdm(range(options.n_draws), desc = 'Hierarchical')])
         # Save draws
         with open(Path(output_pkl, 'draws_'+options.h_name+'.pkl'), 'wb') as f:
-            dill.dump(draws, f)
+            pickle.dump(draws, f, protocol = pickle.HIGHEST_PROTOCOL)
     else:
         try:
             with open(Path(output_pkl, 'draws_'+options.h_name+'.pkl'), 'rb') as f:
@@ -2,6 +2,7 @@ import numpy as np
 
 import optparse as op
 import dill
+import pickle
 import importlib
 
 from pathlib import Path
@@ -56,7 +57,7 @@ class worker:
                 plot_multidim(draws, samples = ev, out_folder = self.out_folder_plots, name = name, labels = self.label, units = self.unit, subfolder = True)
         
         with open(Path(self.out_folder_pkl, 'draws_'+name+'.pkl'), 'wb') as f:
-            dill.dump(np.array(draws), f)
+            pickle.dump(np.array(draws), f, protocol = pickle.HIGHEST_PROTOCOL)
         return draws
 
     def draw_hierarchical(self):
@@ -163,12 +164,12 @@ def main():
     if options.exclude_points:
         print("Ignoring points outside bounds.")
         for i, ev in enumerate(events):
-            events[i] = ev[np.where((np.prod(options.bounds[:,0] < ev, axis = 1) & np.prod(ev < options.bounds[:,1], axis = 1)))]
+            events[i] = ev[np.all((options.bounds[:,0] < ev) & (ev < options.bounds[:,1]), axis = 1)]
         all_samples = np.atleast_2d(np.concatenate(events))
     else:
         # Check if all samples are within bounds
         all_samples = np.atleast_2d(np.concatenate(events))
-        if not np.alltrue([(all_samples[:,i] > options.bounds[i,0]).all() and (all_samples[:,i] < options.bounds[i,1]).all() for i in range(dim)]):
+        if not np.all((options.bounds[:,0] < all_samples) & (all_samples < options.bounds[:,1])):
             raise ValueError("One or more samples are outside the given bounds.")
 
     # Plot labels
@@ -210,7 +211,7 @@ def main():
             # Save all single-event draws together
             posteriors = np.array(posteriors)
             with open(Path(output_pkl, 'posteriors_single_event.pkl'), 'wb') as f:
-                dill.dump(posteriors, f)
+                pickle.dump(posteriors, f, protocol = pickle.HIGHEST_PROTOCOL)
         else:
             # Load pre-computed posteriors
             try:
@@ -228,7 +229,7 @@ def main():
         draws = np.array(draws)
         # Save draws
         with open(Path(output_pkl, 'draws_'+options.h_name+'.pkl'), 'wb') as f:
-            dill.dump(draws, f)
+            pickle.dump(draws, f, protocol = pickle.HIGHEST_PROTOCOL)
     else:
         try:
             with open(Path(output_pkl, 'draws_'+options.h_name+'.pkl'), 'rb') as f:
@@ -2,6 +2,7 @@ import numpy as np
 
 import optparse as op
 import dill
+import pickle
 import importlib
 
 from pathlib import Path
@@ -89,10 +90,10 @@ def main():
         dim = 1
     if options.exclude_points:
         print("Ignoring points outside bounds.")
-        samples = samples[np.where((np.prod(options.bounds[:,0] < samples, axis = 1) & np.prod(samples < options.bounds[:,1], axis = 1)))]
+        samples = samples[np.all((options.bounds[:,0] < samples) & (samples < options.bounds[:,1]), axis = 1)]
     else:
         # Check if all samples are within bounds
-        if not np.alltrue([(samples[:,i] > options.bounds[i,0]).all() and (samples[:,i] < options.bounds[i,1]).all() for i in range(dim)]):
+        if not np.all((options.bounds[:,0] < samples) & (samples < options.bounds[:,1])):
             raise ValueError("One or more samples are outside the given bounds.")
     if options.sigma_prior is not None:
         options.sigma_prior = np.array([float(s) for s in options.sigma_prior.split(',')])
@@ -112,7 +113,7 @@ def main():
         draws = np.array(draws)
         # Save reconstruction
         with open(Path(options.output, 'draws_'+name+'.pkl'), 'wb') as f:
-            dill.dump(draws, f)
+            pickle.dump(draws, f, protocol = pickle.HIGHEST_PROTOCOL)
     else:
         try:
             with open(Path(options.output, 'draws_'+name+'.pkl'), 'rb') as f:
@@ -3,6 +3,7 @@ import numpy as np
 import optparse as op
 import json
 import dill
+import pickle
 import importlib
 
 from pathlib import Path
@@ -83,12 +84,12 @@ def main():
     if options.exclude_points:
         print("Ignoring points outside bounds.")
         for i, ev in enumerate(events):
-            events[i] = ev[np.where((np.prod(options.bounds[:,0] < ev, axis = 1) & np.prod(ev < options.bounds[:,1], axis = 1)))]
+            events[i] = ev[np.all((options.bounds[:,0] < ev) & (ev < options.bounds[:,1]), axis = 1)]
         all_samples = np.atleast_2d(np.concatenate(events))
     else:
         # Check if all samples are within bounds
         all_samples = np.atleast_2d(np.concatenate(events))
-        if not np.alltrue([(all_samples[:,i] > options.bounds[i,0]).all() and (all_samples[:,i] < options.bounds[i,1]).all() for i in range(dim)]):
+        if not np.all((options.bounds[:,0] < all_samples) & (all_samples < options.bounds[:,1])):
             raise ValueError("One or more samples are outside the given bounds.")
     # Plot labels
     if dim > 1:
@@ -142,7 +143,7 @@ def main():
                         plot_multidim(draws, samples = ev, out_folder = output_plots, name = name, labels = symbols, units = units, true_value = t)
                 # Save single-event draws
                 with open(Path(output_pkl, 'draws_'+name+'.pkl'), 'wb') as f:
-                    dill.dump(np.array(draws), f)
+                    pickle.dump(np.array(draws), f, protocol = pickle.HIGHEST_PROTOCOL)
             else:
                 with open(Path(output_pkl, 'draws_'+name+'.pkl'), 'rb') as f:
                     draws = dill.load(f)
@@ -159,7 +160,7 @@ def main():
         # Save all single-event draws together (might be useful for future hierarchical analysis)
         posteriors = np.array(posteriors)
         with open(Path(output_pkl, 'posteriors_single_event.pkl'), 'wb') as f:
-            dill.dump(posteriors, f)
+            pickle.dump(posteriors, f, protocol = pickle.HIGHEST_PROTOCOL)
         # Save credible levels
         CR_levels  = np.array(CR_levels)
         CR_medians = np.array(CR_medians)
@@ -2,15 +2,32 @@ import numpy as np
 
 import optparse as op
 import dill
+import pickle
 import importlib
 
 from pathlib import Path
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 
 from figaro.mixture import DPGMM
-from figaro.utils import save_options, plot_median_cr, plot_multidim, get_priors
+from figaro.utils import save_options, plot_median_cr, plot_multidim, get_priors, init_worker, worker_data
 from figaro.load import load_single_event
 
+def _draw(seed):
+    """
+    Draw a distribution in a worker process.
+    
+    Arguments:
+        :int seed: seed for the random number generators
+    
+    Returns:
+        :mixture: the inferred mixture
+    """
+    np.random.seed(seed)
+    mix = DPGMM(worker_data['bounds'], prior_pars = worker_data['prior_pars'], seed = seed)
+    return mix.density_from_samples(worker_data['samples'])
+
 def main():
 
     parser = op.OptionParser()
@@ -31,6 +48,7 @@ def main():
     parser.add_option("--exclude_points", dest = "exclude_points", action = 'store_true', help = "Exclude points outside bounds from analysis", default = False)
     parser.add_option("--cosmology", type = "string", dest = "cosmology", help = "Cosmological parameters (h, om, ol). Default values from Planck (2021)", default = '0.674,0.315,0.685')
     parser.add_option("--sigma_prior", dest = "sigma_prior", type = "string", help = "Expected standard deviation (prior) - single value or n-dim values. If None, it is estimated from samples", default = None)
+    parser.add_option("--n_jobs", dest = "n_jobs", type = "int", help = "Number of processes used to compute the draws (each draw is independent)", default = 1)
     
     (options, args) = parser.parse_args()
 
@@ -71,10 +89,10 @@ def main():
         dim = 1
     if options.exclude_points:
         print("Ignoring points outside bounds.")
-        samples = samples[np.where((np.prod(options.bounds[:,0] < samples, axis = 1) & np.prod(samples < options.bounds[:,1], axis = 1)))]
+        samples = samples[np.all((options.bounds[:,0] < samples) & (samples < options.bounds[:,1]), axis = 1)]
     else:
         # Check if all samples are within bounds
-        if not np.alltrue([(samples[:,i] > options.bounds[i,0]).all() and (samples[:,i] < options.bounds[i,1]).all() for i in range(dim)]):
+        if not np.all((options.bounds[:,0] < samples) & (samples < options.bounds[:,1])):
             raise ValueError("One or more samples are outside the given bounds.")
     if options.sigma_prior is not None:
         options.sigma_prior = np.array([float(s) for s in options.sigma_prior.split(',')])
@@ -82,11 +100,19 @@ def main():
     # Reconstruction
     if not options.postprocess:
         # Actual analysis
-        mix = DPGMM(options.bounds, prior_pars = get_priors(options.bounds, samples = samples, std = options.sigma_prior))
-        draws = np.array([mix.density_from_samples(samples) for _ in tqdm(range(options.n_draws), desc = name)])
+        prior_pars = get_priors(options.bounds, samples = samples, std = options.sigma_prior)
+        if options.n_jobs > 1:
+            seeds = np.random.randint(2**32, dtype = np.uint64, size = options.n_draws)
+            data  = {'samples': samples, 'bounds': options.bounds, 'prior_pars': prior_pars}
+            # Workers are spawned rather than forked, as in the hierarchical pipeline: forking after parallel numba kernels have run is unsafe
+            with ProcessPoolExecutor(max_workers = options.n_jobs, mp_context = get_context('spawn'), initializer = init_worker, initargs = (data, options.n_jobs)) as executor:
+                draws = np.array(list(tqdm(executor.map(_draw, seeds), total = options.n_draws, desc = name)))
+        else:
+            mix   = DPGMM(options.bounds, prior_pars = prior_pars)
+            draws = np.array([mix.density_from_samples(samples) for _ in tqdm(range(options.n_draws), desc = name)])
         # Save reconstruction
         with open(Path(options.output, 'draws_'+name+'.pkl'), 'wb') as f:
-            dill.dump(draws, f)
+            pickle.dump(draws, f, protocol = pickle.HIGHEST_PROTOCOL)
     else:
         try:
             with open(Path(options.output, 'draws_'+name+'.pkl'), 'rb') as f:
@@ -1,5 +1,5 @@
 import numpy as np
-from scipy.special import erfinv, erf
+from scipy.special import ndtr, ndtri
 
 log2PI = np.log(2.0*np.pi)
 
@@ -24,9 +24,11 @@ def transform_to_probit(x, bounds):
     Returns:
         :np.ndarray: sample(s)
     '''
-    cdf = (x - bounds[:,0])/(bounds[:,1]-bounds[:,0])
-    o = np.sqrt(2.0)*erfinv(2*cdf-1)
-    return o
+    # ndtri(cdf) = sqrt(2)*erfinv(2*cdf-1), in a single ufunc call and without the cancellation in 2*cdf-1
+    # All the operations after the first one are done in place, on a single temporary array (float, also for integer inputs)
+    o  = np.subtract(x, bounds[:,0], dtype = np.float64)
+    o /= bounds[:,1]-bounds[:,0]
+    return ndtri(o, out = o)
 
 def transform_from_probit(x, bounds):
     '''
@@ -42,10 +44,37 @@ def transform_from_probit(x, bounds):
     Returns:
         :np.ndarray: sample(s)
     '''
-    cdf = 0.5*(1.0+erf(x/np.sqrt(2.0)))
-    o = bounds[:,0]+(bounds[:,1]-bounds[:,0])*cdf
+    # ndtr(x) = 0.5*(1+erf(x/sqrt(2)))
+    # The rescaling is done in place on the ndtr output
+    o  = ndtr(x)
+    o *= bounds[:,1]-bounds[:,0]
+    o += bounds[:,0]
     return o
 
-def probit_logJ(x, bounds):
-    res = np.sum(-0.5*x**2-0.5*log2PI+np.log(bounds[:,1]-bounds[:,0]), axis = -1)
-    return res
+def probit_logJ_const(bounds):
+    '''
+    Bounds-dependent (x-independent) term of the log Jacobian of the probit transformation.
+    
+    Arguments:
+        :np.ndarray bounds: limits for each dimension (2d array, [[xmin, xmax], [ymin, ymax]...])
+    
+    Returns:
+        :double: sum(log(xmax-xmin)) - 0.5*dim*log(2pi)
+    '''
+    return np.sum(np.log(bounds[:,1]-bounds[:,0]) - 0.5*log2PI)
+
+def probit_logJ(x, bounds, const = None):
+    '''
+    Log Jacobian of the probit transformation.
+    
+    Arguments:
+        :np.ndarray x:      sample(s) in probit space (2d array)
+        :np.ndarray bounds: limits for each dimension (2d array, [[xmin, xmax], [ymin, ymax]...])
+        :double const:      probit_logJ_const(bounds), if already available
+    
+    Returns:
+        :np.ndarray: log Jacobian for each sample
+    '''
+    if const is None:
+        const = probit_logJ_const(bounds)
+    return const - 0.5*np.einsum('...i,...i->...', x, x)
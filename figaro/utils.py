@@ -2,6 +2,7 @@ import numpy as np
 
 import warnings
 from pathlib import Path
+from functools import lru_cache
 
 from distutils.spawn import find_executable
 
@@ -11,28 +12,39 @@ from matplotlib import axes
 from matplotlib.projections import projection_registry
 import matplotlib.patches as mpatches
 from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
 from corner import corner
 
 from tqdm import tqdm
 
-from collections import Counter
 import scipy.stats
+from numba import config, set_num_threads
 
 from figaro.transform import transform_to_probit
 from figaro.marginal import marginalise
 from figaro.credible_regions import ConfidenceArea
 
-if find_executable('latex'):
-    rcParams["text.usetex"] = True
-rcParams["xtick.labelsize"]=14
-rcParams["ytick.labelsize"]=14
-rcParams["xtick.direction"]="in"
-rcParams["ytick.direction"]="in"
-rcParams["legend.fontsize"]=12
-rcParams["axes.labelsize"]=16
-rcParams["axes.grid"] = True
-rcParams["grid.alpha"] = 0.6
-rcParams["contour.negative_linestyle"] = 'solid'
+_mpl_configured = False
+
+def _configure_mpl():
+    """
+    Sets the matplotlib style used by FIGARO plots. Called by each plotting function rather than on import, so that non-plotting workflows (and worker processes) do not pay for it.
+    """
+    global _mpl_configured
+    if _mpl_configured:
+        return
+    _mpl_configured = True
+    if find_executable('latex'):
+        rcParams["text.usetex"] = True
+    rcParams["xtick.labelsize"]=14
+    rcParams["ytick.labelsize"]=14
+    rcParams["xtick.direction"]="in"
+    rcParams["ytick.direction"]="in"
+    rcParams["legend.fontsize"]=12
+    rcParams["axes.labelsize"]=16
+    rcParams["axes.grid"] = True
+    rcParams["grid.alpha"] = 0.6
+    rcParams["contour.negative_linestyle"] = 'solid'
 
 #-–––––––––-#
 # Utilities #
@@ -40,7 +52,8 @@ rcParams["contour.negative_linestyle"] = 'solid'
 
 def recursive_grid(bounds, n_pts):
     """
-    Recursively generates the n-dimensional grid points (extremes are excluded).
+    Generates the n-dimensional grid points (extremes are excluded).
+    The first dimension varies slowest.
     
     Arguments:
         :list-of-lists bounds: extremes for each dimension (excluded)
@@ -48,23 +61,15 @@ def recursive_grid(bounds, n_pts):
         
     Returns:
         :np.ndarray: grid
+        :list:       grid spacing for each dimension
     """
     bounds = np.atleast_2d(bounds)
     n_pts  = np.atleast_1d(n_pts)
-    if len(bounds) == 1:
-        d  = np.linspace(bounds[0,0], bounds[0,1], n_pts[0]+2)[1:-1]
-        dD = d[1]-d[0]
-        return np.atleast_2d(d).T, [dD]
-    else:
-        grid_nm1, diff = recursive_grid(np.array(bounds)[1:], n_pts[1:])
-        
-        d = np.linspace(bounds[0,0], bounds[0,1], n_pts[0]+2)[1:-1]
-        diff.append(d[1]-d[0])
-        grid     = []
-        for di in d:
-            for gi in grid_nm1:
-                grid.append([di,*gi])
-        return np.array(grid), diff
+    axes = [np.linspace(b[0], b[1], n+2)[1:-1] for b, n in zip(bounds, n_pts)]
+    diff = [a[1]-a[0] for a in axes]
+    mesh = np.meshgrid(*axes, indexing = 'ij')
+    grid = np.stack([m.ravel() for m in mesh], axis = -1)
+    return grid, diff
 
 def rejection_sampler(n_draws, f, bounds, selfunc = None):
     """
@@ -82,15 +87,19 @@ def rejection_sampler(n_draws, f, bounds, selfunc = None):
     n_draws = int(n_draws)
     if selfunc is None:
         selfunc = lambda x: 1
-    x   = np.linspace(bounds[0], bounds[1], 1000)
-    top = np.max(f(x)*selfunc(x))
-    samples = []
-    while len(samples) < n_draws:
-        pts   = np.random.uniform(bounds[0], bounds[1], size = n_draws)
-        probs = f(pts)*selfunc(pts)
-        h     = np.random.uniform(0, top, size = n_draws)
-        samples.extend(pts[np.where(h < probs)])
-    return np.array(samples).flatten()[:n_draws]
+    # Seeded from numpy's global state, so np.random.seed still applies
+    rng     = np.random.default_rng(np.random.randint(2**32, dtype = np.uint64))
+    x       = np.linspace(bounds[0], bounds[1], 1000)
+    top     = (f(x)*selfunc(x)).max()
+    samples = np.empty(n_draws)
+    filled  = 0
+    while filled < n_draws:
+        pts    = rng.uniform(bounds[0], bounds[1], size = n_draws)
+        acc    = pts[rng.uniform(0, top, size = n_draws) < f(pts)*selfunc(pts)]
+        n_acc  = min(len(acc), n_draws - filled)
+        samples[filled:filled+n_acc] = acc[:n_acc]
+        filled += n_acc
+    return samples
 
 def get_priors(bounds, samples = None, mean = None, std = None, cov = None, df = None, k = None):
     """
@@ -135,7 +144,7 @@ def get_priors(bounds, samples = None, mean = None, std = None, cov = None, df =
     # Mu
     if mean is not None:
         mean = np.atleast_1d(mean)
-        if not np.prod(bounds[:,0] < mean) & np.prod(mean < bounds[:,1]):
+        if not np.all((bounds[:,0] < mean) & (mean < bounds[:,1])):
             raise ValueError("Mean is outside of the given bounds")
         mu_out = transform_to_probit(mean, bounds)
     elif samples is not None:
@@ -151,10 +160,12 @@ def get_priors(bounds, samples = None, mean = None, std = None, cov = None, df =
         draw_flag = True
     elif samples is not None:
         # 1/3 (arbitrary) std of samples
-        L_out = np.atleast_2d(np.cov(probit_samples.T))/9
-        diag  = np.sqrt(np.diag(L_out))
-        stds  = np.minimum(diag, 0.2)
-        L_out = L_out*np.outer(stds, stds)/np.outer(diag, diag)
+        Xc     = probit_samples - probit_samples.mean(axis = 0)
+        L_out  = (Xc.T @ Xc)/(9*(len(Xc)-1))
+        # Standard deviations are capped at 0.2, rescaling rows and columns in place
+        diag   = np.sqrt(np.diag(L_out))
+        ratio  = np.minimum(diag, 0.2)/diag
+        L_out *= np.outer(ratio, ratio)
     else:
         L_out = np.identity(dim)*0.2**2
     # k
@@ -168,19 +179,52 @@ def get_priors(bounds, samples = None, mean = None, std = None, cov = None, df =
         if dim == 1:
             ss = np.atleast_2d(ss).T
         # Keeping only samples within bounds
-        ss = ss[np.where((np.prod(bounds[:,0] < ss, axis = 1) & np.prod(ss < bounds[:,1], axis = 1)))]
+        ss = ss[np.all((bounds[:,0] < ss) & (ss < bounds[:,1]), axis = 1)]
         probit_samples = transform_to_probit(ss, bounds)
         L_out = np.atleast_2d(np.cov(probit_samples.T))
         
     return (k_out, L_out, df_out, mu_out)
 
 def rvs_median(draws, n_draws):
-    idx = np.random.choice(np.arange(len(draws)), size = n_draws)
-    ctr = Counter(idx)
-    samples = np.empty(shape = (1, draws[0].dim))
-    for i, n in zip(ctr.keys(), ctr.values()):
-        samples = np.concatenate((samples, draws[i].rvs(n)))
-    return samples[1:]
+    n_draws = int(n_draws)
+    idx     = np.random.randint(len(draws), size = n_draws)
+    counts  = np.bincount(idx, minlength = len(draws))
+    starts  = np.concatenate(([0], np.cumsum(counts)))
+    samples = np.empty(shape = (n_draws, draws[0].dim))
+    for i in np.flatnonzero(counts):
+        samples[starts[i]:starts[i+1]] = draws[i].rvs(counts[i])
+    return samples
+
+def _stack_bounds(draws):
+    """
+    Collects the bounds of a set of draws in a single array.
+    
+    Arguments:
+        :iterable draws: container of mixture instances
+    
+    Returns:
+        :np.ndarray: (n_draws, dim, 2) bounds
+    """
+    all_bounds = np.empty((len(draws), draws[0].dim, 2))
+    for i, d in enumerate(draws):
+        all_bounds[i] = d.bounds
+    return all_bounds
+
+def _stack_pdfs(draws, x):
+    """
+    Evaluates the pdf of a set of draws on the same points, writing in a preallocated array.
+    
+    Arguments:
+        :iterable draws: container of mixture instances
+        :np.ndarray x:   points
+    
+    Returns:
+        :np.ndarray: (n_draws, n_pts) pdf of each draw
+    """
+    out = np.empty((len(draws), len(x)))
+    for i, d in enumerate(draws):
+        out[i] = d.pdf(x)
+    return out
 
 #-------------#
 #   Options   #
@@ -198,10 +242,70 @@ def save_options(options, out_folder):
         logfile.write('{0}: {1}\n'.format(key,val))
     logfile.close()
 
+#-------------#
+#  Parallel   #
+#-------------#
+
+# Data shared by the pipeline worker processes, set once per process by init_worker
+worker_data = {}
+
+def init_worker(data, n_jobs):
+    """
+    Initialiser for the pipeline worker processes (ProcessPoolExecutor(initializer = init_worker, initargs = (data, n_jobs))).
+    The numba kernels are parallel too: the threads (NUMBA_NUM_THREADS in total) are split among the worker processes to avoid oversubscription.
+    The OpenMP kernel in figaro.likelihood_1d reads the same thread count (numba.get_num_threads).
+    
+    Arguments:
+        :dict data:  data shared by all the draws, sent once per worker process rather than once per draw
+        :int n_jobs: number of worker processes
+    """
+    set_num_threads(max(1, config.NUMBA_NUM_THREADS//n_jobs))
+    worker_data.update(data)
+
 #-------------#
 #    Plots    #
 #-------------#
 
+def _save_percentiles(file, x, p, output_format = 'txt'):
+    """
+    Saves the percentiles of the reconstructed distribution, with columns x 50 5 16 84 95.
+    
+    Arguments:
+        :Path file:         output file, without extension
+        :np.ndarray x:      points
+        :dict p:            percentiles
+        :str output_format: 'txt' (text), 'npy' (binary) or 'both'
+    """
+    if output_format not in ('txt', 'npy', 'both'):
+        raise ValueError("output_format must be 'txt', 'npy' or 'both'")
+    table = np.stack([x, p[50], p[5], p[16], p[84], p[95]], axis = 1)
+    if output_format in ('txt', 'both'):
+        np.savetxt(Path(file.parent, file.name+'.txt'), table, header = 'x 50 5 16 84 95')
+    if output_format in ('npy', 'both'):
+        np.save(Path(file.parent, file.name+'.npy'), table)
+
+@lru_cache(maxsize = 32)
+def _pp_band(n, cl):
+    """
+    Confidence band for the pp-plot. It depends only on n and cl, so it is computed once and cached.
+    
+    Arguments:
+        :int n:     number of P-values
+        :double cl: confidence level
+    
+    Returns:
+        :np.ndarray: P-values
+        :np.ndarray: lower bound of the band
+        :np.ndarray: upper bound of the band
+    """
+    k = np.arange(0, n + 1)
+    p = k / n
+    ci_lo, ci_hi = scipy.stats.beta.interval(cl, k + 1, n - k + 1)
+    # Shared by all the calls: read-only
+    for a in (p, ci_lo, ci_hi):
+        a.setflags(write = False)
+    return p, ci_lo, ci_hi
+
 class PPPlot(axes.Axes):
     """
     Construct a probability-probability (P-P) plot.
@@ -255,10 +359,7 @@ class PPPlot(axes.Axes):
         **kwargs :
             optional extra arguments to `matplotlib.axes.Axes.fill_betweenx`
         """
-        n = nsamples
-        k = np.arange(0, n + 1)
-        p = k / n
-        ci_lo, ci_hi = scipy.stats.beta.interval(cl, k + 1, n - k + 1)
+        p, ci_lo, ci_hi = _pp_band(int(nsamples), cl)
 
         # Make copy of kwargs to pass to fill_betweenx()
         kwargs = dict(kwargs)
@@ -280,7 +381,7 @@ class PPPlot(axes.Axes):
         
 projection_registry.register(PPPlot)
 
-def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bounds = None, out_folder = '.', name = 'density', n_pts = 1000, label = None, unit = None, hierarchical = False, show = False, save = True, subfolder = False, true_value = None):
+def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bounds = None, out_folder = '.', name = 'density', n_pts = 1000, label = None, unit = None, hierarchical = False, show = False, save = True, subfolder = False, true_value = None, output_format = 'txt'):
     """
     Plot the recovered 1D distribution along with the injected distribution and samples from the true distribution (both if available).
     
@@ -297,13 +398,15 @@ def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bound
         :bool hierarchical:               hierarchical inference, for plotting purposes
         :bool save:                       whether to save the plot or not
         :bool show:                       whether to show the plot during the run or not
+        :str output_format:               format of the saved percentiles: 'txt' (text), 'npy' (binary, faster) or 'both'
     """
+    _configure_mpl()
     if hierarchical:
         rec_label = '\mathrm{(H)DPGMM}'
     else:
         rec_label = '\mathrm{DPGMM}'
     
-    all_bounds = np.atleast_2d([d.bounds[0] for d in draws])
+    all_bounds = _stack_bounds(draws)[:,0]
     x_min = np.max(all_bounds[:,0])
     x_max = np.min(all_bounds[:,1])
     
@@ -320,15 +423,13 @@ def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bound
     x    = np.linspace(x_min, x_max, n_pts+2)[1:-1]
     dx   = x[1]-x[0]
     
-    probs = np.array([d.pdf(x) for d in draws])
+    probs = _stack_pdfs(draws, x)
     
     percentiles = [50, 5, 16, 84, 95]
-    p = {}
-    for perc in percentiles:
-        p[perc] = np.percentile(probs, perc, axis = 0)
-    norm = p[50].sum()*dx
-    for perc in percentiles:
-        p[perc] = p[perc]/norm
+    # All the percentiles with a single call, normalised in place
+    q  = np.percentile(probs, percentiles, axis = 0)
+    q /= q[0].sum()*dx
+    p  = dict(zip(percentiles, q))
     
     fig, ax = plt.subplots()
     
@@ -405,7 +506,7 @@ def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bound
         if samples is not None:
             ax.set_xlim(xlim)
         fig.savefig(Path(plot_folder, '{0}.pdf'.format(name)), bbox_inches = 'tight')
-        np.savetxt(Path(txt_folder, 'prob_{0}.txt'.format(name)), np.array([x, p[50], p[5], p[16], p[84], p[95]]).T, header = 'x 50 5 16 84 95')
+        _save_percentiles(Path(txt_folder, 'prob_{0}'.format(name)), x, p, output_format)
     if show:
         ax.set_yscale('linear')
         ax.autoscale(True)
@@ -416,11 +517,10 @@ def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bound
     
     # If selection function is available, plot reweighted distribution
     if injected is not None and selfunc is not None:
-        for perc in percentiles:
-            p[perc] = np.percentile((probs/f_x).T, perc, axis = 1)
-        norm = p[50].sum()*dx
-        for perc in percentiles:
-            p[perc] = p[perc]/norm
+        # f_x is the same for all draws, so the percentiles of probs/f_x are the percentiles of probs divided by f_x
+        q  = q/f_x
+        q /= q[0].sum()*dx
+        p  = dict(zip(percentiles, q))
         
         fig, ax = plt.subplots()
         ax.set_yscale('log')
@@ -447,7 +547,7 @@ def plot_median_cr(draws, injected = None, samples = None, selfunc = None, bound
             ax.set_yscale('linear')
             ax.autoscale(True)
             fig.savefig(Path(plot_folder, 'inj_{0}.pdf'.format(name)), bbox_inches = 'tight')
-            np.savetxt(Path(txt_folder, 'prob_inj_{0}.txt'.format(name)), np.array([x, p[50], p[5], p[16], p[84], p[95]]).T, header = 'x 50 5 16 84 95')
+            _save_percentiles(Path(txt_folder, 'prob_inj_{0}'.format(name)), x, p, output_format)
         if show:
             ax.set_yscale('linear')
             ax.autoscale(True)
@@ -476,6 +576,7 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
         :double figsize:         figure size (matplotlib)
         :iterable levels:        credible levels to plot
     """
+    _configure_mpl()
     
     dim = draws[0].dim
     
@@ -494,11 +595,15 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
     
     levels = np.atleast_1d(levels)
 
-    all_bounds = np.atleast_2d([d.bounds for d in draws])
-    x_min = np.min(all_bounds, axis = -1).max(axis = 0)
-    x_max = np.max(all_bounds, axis = -1).min(axis = 0)
+    all_bounds = _stack_bounds(draws)
+    x_min = all_bounds[...,0].max(axis = 0)
+    x_max = all_bounds[...,1].min(axis = 0)
     
     bounds = np.array([x_min, x_max]).T
+    # 1D grids, shared by the diagonal and off-diagonal panels
+    axes_pts = [np.linspace(lim[0], lim[1], n_pts+2)[1:-1] for lim in bounds]
+    # Tick positions, shared by all the panels of the same dimension
+    ticks    = [np.linspace(lim[0], lim[1], 5) for lim in bounds]
     K = dim
     factor = 2.0          # size of one side of one panel
     lbdim = 0.5 * factor  # size of left/bottom margin
@@ -522,18 +627,15 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
         marg_draws = marginalise(draws, dims)
         # Credible regions
         lim = bounds[column]
-        x = np.linspace(lim[0], lim[1], n_pts+2)[1:-1]
-        dx   = x[1]-x[0]
+        x   = axes_pts[column]
+        dx  = x[1]-x[0]
         
-        probs = np.array([d.pdf(x) for d in marg_draws])
+        probs = _stack_pdfs(marg_draws, x)
         
         percentiles = [50, 5, 16, 84, 95]
-        p = {}
-        for perc in percentiles:
-            p[perc] = np.percentile(probs, perc, axis = 0)
-        norm = p[50].sum()*dx
-        for perc in percentiles:
-            p[perc] = p[perc]/norm
+        q  = np.percentile(probs, percentiles, axis = 0)
+        q /= q[0].sum()*dx
+        p  = dict(zip(percentiles, q))
         
         # Samples (if available)
         if samples is not None:
@@ -552,9 +654,8 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
             ax.set_yticks([])
             if labels is not None:
                 ax.set_xlabel(labels[-1])
-            ticks = np.linspace(lim[0], lim[1], 5)
-            ax.set_xticks(ticks)
-            [l.set_rotation(45) for l in ax.get_xticklabels()]
+            ax.set_xticks(ticks[column])
+            ax.tick_params(axis = 'x', labelrotation = 45)
         ax.set_xlim(lim[0], lim[1])
     
     # 2D plots (off-diagonal)
@@ -578,19 +679,21 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
             
             # Credible regions
             lim = bounds[[row, column]]
-            grid, dgrid = recursive_grid(lim[::-1], np.ones(2, dtype = int)*int(n_pts))
+            x   = axes_pts[row]
+            y   = axes_pts[column]
+            # The same mesh is used for the evaluation grid (column coordinate varying slowest) and for the contour plots
+            Y, X  = np.meshgrid(y, x, indexing = 'ij')
+            grid  = np.stack((Y.ravel(), X.ravel()), axis = -1)
+            dgrid = [x[1]-x[0], y[1]-y[0]]
             
-            x = np.linspace(lim[0,0], lim[0,1], n_pts+2)[1:-1]
-            y = np.linspace(lim[1,0], lim[1,1], n_pts+2)[1:-1]
-            
-            dd = np.array([d.pdf(grid) for d in marg_draws])
-            median = np.percentile(dd, 50, axis = 0)
-            median = median/(median.sum()*np.prod(dgrid))
-            median = median.reshape(n_pts, n_pts)
-            
-            X,Y = np.meshgrid(x,y)
+            dd = _stack_pdfs(marg_draws, grid)
+            # Normalisation, log and NaN handling are done in place on the median
+            median  = np.percentile(dd, 50, axis = 0)
+            median /= median.sum()*np.prod(dgrid)
+            logmedian = median.reshape(n_pts, n_pts)
             with np.errstate(divide = 'ignore'):
-                logmedian = np.nan_to_num(np.log(median), nan = -np.inf, neginf = -np.inf)
+                np.log(logmedian, out = logmedian)
+            np.nan_to_num(logmedian, copy = False, nan = -np.inf, neginf = -np.inf)
             _,_,levs = ConfidenceArea(logmedian, x, y, adLevels=levels)
             ax.contourf(Y, X, np.exp(logmedian), cmap = 'Blues', levels = 100)
             if true_value is not None:
@@ -610,13 +713,11 @@ def plot_multidim(draws, samples = None, out_folder = '.', name = 'density', lab
             
             if column == 0:
                 ax.set_ylabel(labels[row])
-                ticks = np.linspace(lim[0,0], lim[0,1], 5)
-                ax.set_yticks(ticks)
-                [l.set_rotation(45) for l in ax.get_yticklabels()]
+                ax.set_yticks(ticks[row])
+                ax.tick_params(axis = 'y', labelrotation = 45)
             if row == K - 1:
-                ticks = np.linspace(lim[1,0], lim[1,1], 5)
-                ax.set_xticks(ticks)
-                [l.set_rotation(45) for l in ax.get_xticklabels()]
+                ax.set_xticks(ticks[column])
+                ax.tick_params(axis = 'x', labelrotation = 45)
                 ax.set_xlabel(labels[column])
                 
             elif row < K - 1:
@@ -650,6 +751,7 @@ def plot_n_clusters_alpha(n_cl, alpha, out_folder = '.', name = 'event', show =
         :bool save:              whether to save the plot or not
         :bool show:              whether to show the plot during the run or not
     """
+    _configure_mpl()
     fig, ax = plt.subplots()
     ax1 = ax.twinx()
     ax.plot(np.arange(1, len(n_cl)+1), n_cl, ls = '--', marker = '', lw = 0.7, color = 'k')
@@ -677,16 +779,18 @@ def pp_plot_cdf(draws, injection, n_points = 1000, out_folder = '.', name = 'eve
         :bool save:              whether to save the plot or not
         :bool show:              whether to show the plot during the run or not
     """
-    all_bounds = np.atleast_2d([d.bounds[0] for d in draws])
+    _configure_mpl()
+    all_bounds = _stack_bounds(draws)[:,0]
     x_min = np.max(all_bounds[:,0])
     x_max = np.min(all_bounds[:,1])
     x = np.linspace(x_min, x_max, n_points+2)[1:-1]
     
-    functions     = np.array([mix(x) for mix in draws])
+    functions     = _stack_pdfs(draws, x)
     median        = np.percentile(functions, 50, axis = 0)
-    cdf_draws     = np.array([fast_cumulative(d) for d in functions])
-    cdf_median    = fast_cumulative(median)
-    cdf_injection = fast_cumulative(injection(x))
+    # Running sums, as in cumulative.fast_cumulative, for all the draws at once
+    cdf_draws     = np.cumsum(functions, axis = 1)
+    cdf_median    = np.cumsum(median)
+    cdf_injection = np.cumsum(injection(x))
     
     fig = plt.figure()
     ax  = fig.add_subplot(111, projection = 'pp_plot')
@@ -716,6 +820,7 @@ def pp_plot_levels(CR_levels, median_CR = None, out_folder = '.', name = 'MDC',
         :bool save:              whether to save the plot or not
         :bool show:              whether to show the plot during the run or not
     """
+    _configure_mpl()
     if len(CR_levels.shape) > 1:
         CR_levels = CR_levels.T
     n_evs     = CR_levels.shape[-1]
@@ -726,15 +831,16 @@ def pp_plot_levels(CR_levels, median_CR = None, out_folder = '.', name = 'MDC',
     ax.add_confidence_band(n_evs, zorder = n_evs)
     ax.add_diagonal(zorder = n_evs+1)
     if len(CR_levels.shape) > 1:
-        sorted = []
-        for cr in CR_levels:
-            if median_CR is not None:
-                lw = 0.3
-                c  = 'lightsteelblue'
-            else:
-                lw = 0.6
-                c  = 'steelblue'
-            ax.plot(np.sort(cr), L, lw = lw, alpha = 0.5, color = c)
+        if median_CR is not None:
+            lw = 0.3
+            c  = 'lightsteelblue'
+        else:
+            lw = 0.6
+            c  = 'steelblue'
+        # All the draws in a single artist, with the zorder of a line
+        sorted_CR = np.sort(CR_levels, axis = 1)
+        segments  = np.stack((sorted_CR, np.broadcast_to(L, sorted_CR.shape)), axis = -1)
+        ax.add_collection(LineCollection(segments, linewidths = lw, alpha = 0.5, colors = c, zorder = 2))
         if median_CR is not None:
             ax.plot(np.sort(median_CR), L, lw = 0.8, color = 'steelblue', label = '$\mathrm{Median}$', zorder = n_evs+2)
         # Add label for draws
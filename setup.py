@@ -39,6 +39,13 @@ ext_modules=[
                        extra_compile_args=["-O3","-ffast-math"],
                        include_dirs=['figaro', numpy.get_include()]
                        ),
+             Extension("figaro.likelihood_1d",
+                       sources=[os.path.join("figaro","likelihood_1d.pyx")],
+                       libraries=["m"], # Unix-like specific
+                       extra_compile_args=["-O3","-ffast-math","-fno-finite-math-only","-fopenmp"], # logsumexp must handle -inf terms
+                       extra_link_args=["-fopenmp"],
+                       include_dirs=['figaro', numpy.get_include()]
+                       ),
             ]
 if lal_flag:
     if "LAL_PREFIX" in os.environ:
@@ -62,6 +69,10 @@ if lal_flag:
                            ))
 
 ext_modules = cythonize(ext_modules, compiler_directives={'language_level' : "3"})
+# likelihood_1d needs OpenMP, which some compilers (e.g. Apple clang) reject: if it fails to build, figaro.mixture falls back on the numba kernel
+for ext in ext_modules:
+    if ext.name == "figaro.likelihood_1d":
+        ext.optional = True
 
 scripts = ['figaro-density=figaro.pipelines.probability_density:main',
            'figaro-hierarchical=figaro.pipelines.hierarchical_inference:main',